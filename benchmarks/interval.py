@@ -0,0 +1,146 @@
+"""
+Benchmark convergence of split quality against wall-clock for `--regularize-every`.
+
+Linear spatial network is trained on synthetic multi-task data (each task
+is a random linear teacher looking at its own part of the image) with
+spatial penalties applied every `k` steps. Periodically the network is split
+greedily (as `split --method greedy` does) and accuracy of each per-task
+subnetwork on its own task is measured. Training time excludes evaluation.
+
+Run from repository root::
+
+    python benchmarks/interval.py --every 1 2 5 10 --steps 300
+
+"""
+
+import argparse
+import copy
+import pathlib
+import sys
+import time
+import types
+
+import torch
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import nn  # isort:skip
+from options.split.backward import greedy  # isort:skip
+
+
+def get_model(args):
+    model = nn.models.get(
+        types.SimpleNamespace(
+            type="linear",
+            labels=args.labels,
+            datasets=[None] * args.tasks,
+            activation="ReLU",
+            layers=args.layers,
+            where=args.where,
+        )
+    )
+    # Shape inference
+    model(torch.randn(1, 1, 28, 28))
+    return model
+
+
+def get_teachers(args):
+    """Random linear teacher per task, each seeing different rows of the image."""
+    rows = torch.arange(28).chunk(args.tasks)
+    teachers = []
+    for task_rows in rows:
+        mask = torch.zeros(1, 28, 28)
+        mask[:, task_rows] = 1
+        teachers.append((torch.randn(28 * 28, args.labels) * mask.flatten(0).unsqueeze(-1)))
+    return teachers
+
+
+def get_batch(teachers, batch: int):
+    images = torch.randn(batch, 1, 28, 28)
+    targets = torch.stack(
+        [(images.flatten(1) @ teacher).argmax(dim=-1) for teacher in teachers], dim=-1
+    )
+    return images, targets
+
+
+def split_accuracy(model, teachers, args):
+    """Mean accuracy of greedily split per-task subnetworks on their tasks."""
+    images, targets = get_batch(teachers, args.test)
+    with torch.no_grad():
+        masker = greedy.Masker(args.labels)
+        spatial = [module for module in model.modules() if nn.layers.spatial(module)]
+        masks = [masker(module) for module in reversed(spatial)]
+        masks = list(reversed(masks[:-1])) + [
+            torch.tensor(list(range(args.tasks)) * args.labels)
+        ]
+        accuracies = []
+        for task in range(args.tasks):
+            task_model = copy.deepcopy(model).eval()
+            task_spatial = [
+                module for module in task_model.modules() if nn.layers.spatial(module)
+            ]
+            for index, (module, mask) in enumerate(zip(task_spatial, masks)):
+                if index in args.where:
+                    masker.apply(module.weight.data, mask, task)
+            y_pred = task_model(images).reshape(args.test, args.labels, args.tasks)
+            accuracies.append(
+                (y_pred[..., task].argmax(dim=1) == targets[:, task]).float().mean()
+            )
+    return torch.stack(accuracies).mean().item()
+
+
+def run(args):
+    if args.where is None:
+        args.where = list(range(len(args.layers) + 1))
+    torch.manual_seed(args.seed)
+    teachers = get_teachers(args)
+    for every in args.every:
+        torch.manual_seed(args.seed)
+        model = get_model(args)
+        criterion = nn.loss.SpatialCrossEntropyLoss(
+            model,
+            args.proximity,
+            args.transport,
+            args.norm,
+            args.where,
+            args.labels,
+            tile=args.tile,
+            every=every,
+        )
+        optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
+        elapsed = 0.0
+        for step in range(1, args.steps + 1):
+            images, targets = get_batch(teachers, args.batch)
+            start = time.perf_counter()
+            model.train()
+            optimizer.zero_grad()
+            loss = criterion(model(images), targets)
+            loss.backward()
+            optimizer.step()
+            elapsed += time.perf_counter() - start
+            if step % args.evaluate == 0:
+                print(
+                    f"every {every:>3} | step {step:>6} | {elapsed:8.2f} s | "
+                    f"loss {loss.item():.4f} | split accuracy "
+                    f"{split_accuracy(model, teachers, args):.4f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--every", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--evaluate", type=int, default=50)
+    parser.add_argument("--layers", type=int, nargs="+", default=[512, 512])
+    parser.add_argument("--where", type=int, nargs="+", default=None)
+    parser.add_argument("--batch", type=int, default=128)
+    parser.add_argument("--test", type=int, default=2048)
+    parser.add_argument("--labels", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=2)
+    parser.add_argument("--proximity", type=float, default=1.0)
+    parser.add_argument("--transport", type=float, default=1.0)
+    parser.add_argument("--norm", choices=("l1", "l2"), default="l1")
+    parser.add_argument("--tile", type=int, default=1024)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--seed", type=int, default=1)
+    run(parser.parse_args())
@@ -0,0 +1,92 @@
+"""
+Benchmark single training step with eager and compiled spatial loss.
+
+Step consists of forward pass, loss calculation and backward pass of linear
+spatial network (random data), just like `nn.passes.Train` (without optimizer).
+
+Run from repository root::
+
+    python benchmarks/loss.py --layers 1024 1024 512 --batch 256
+
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+import types
+
+import torch
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import nn  # isort:skip
+
+
+def get_model(args):
+    model = nn.models.get(
+        types.SimpleNamespace(
+            type="linear",
+            labels=args.labels,
+            datasets=[None] * args.tasks,
+            activation="ReLU",
+            layers=args.layers,
+            where=args.where,
+        )
+    )
+    # Shape inference
+    model(torch.randn(1, 1, 28, 28))
+    return model
+
+
+def timed(model, criterion, args):
+    """Mean wall-clock (seconds) of single training step."""
+    images = torch.randn(args.batch, 1, 28, 28)
+    targets = torch.randint(args.labels, (args.batch, args.tasks))
+
+    def step():
+        model.zero_grad()
+        criterion(model(images), targets).backward()
+
+    for _ in range(args.warmup):
+        step()
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        step()
+    return (time.perf_counter() - start) / args.repeats
+
+
+def run(args):
+    torch.manual_seed(args.seed)
+    if args.where is None:
+        args.where = list(range(len(args.layers) + 1))
+    model = get_model(args)
+    criteria = {
+        "eager": nn.loss.SpatialCrossEntropyLoss(
+            model, 1.0, 1.0, args.norm, args.where, args.labels, tile=args.tile
+        ),
+        "compiled": nn.loss.CompiledSpatialCrossEntropyLoss(
+            model, 1.0, 1.0, args.norm, args.where, args.labels
+        ),
+    }
+    baseline = None
+    for name, criterion in criteria.items():
+        step = timed(model, criterion, args)
+        if baseline is None:
+            baseline = step
+        print(f"{name:<10} {step * 1000:8.2f} ms/step (speedup {baseline / step:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--layers", type=int, nargs="+", default=[1024, 1024, 512])
+    parser.add_argument("--where", type=int, nargs="+", default=None)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--labels", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=2)
+    parser.add_argument("--tile", type=int, default=1024)
+    parser.add_argument("--norm", choices=("l1", "l2"), default="l2")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    run(parser.parse_args())
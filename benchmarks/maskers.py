@@ -0,0 +1,89 @@
+"""
+Benchmark split maskers (`options.split.backward`) against number of tasks.
+
+Masks of wide spatial linear network are created layer by layer from the
+output (just like `split` does) and applied to every layer for every task.
+Reports wall-clock of mask creation and of applying masks of all tasks.
+
+Run from repository root::
+
+    python benchmarks/maskers.py --width 4096 --tasks 2 10 20 50
+
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import nn  # isort:skip
+from options.split.backward import greedy, probability, rescale  # isort:skip
+
+
+def get_layers(args, tasks: int):
+    """Spatial linear layers `784 -> width -> ... -> labels * tasks` with positive weights."""
+    sizes = [28 * 28] + [args.width] * args.depth + [args.labels * tasks]
+    layers = []
+    for in_features, out_features in zip(sizes[:-1], sizes[1:]):
+        layer = nn.layers._SpatialLinear(in_features, out_features)
+        torch.nn.init.uniform_(layer.weight)
+        layers.append(layer.requires_grad_(False))
+    return layers
+
+
+def timed(args, masker_class, layers, tasks: int):
+    """Mean seconds of creating masks and of applying them for all tasks."""
+    creation, application = 0.0, 0.0
+    for _ in range(args.repeats):
+        masker = masker_class(args.labels)
+        start = time.perf_counter()
+        masks = [masker(layer) for layer in reversed(layers)]
+        creation += time.perf_counter() - start
+
+        masks = list(reversed(masks[:-1]))
+        weights = [layer.weight.data.clone() for layer in layers]
+        start = time.perf_counter()
+        for task in range(tasks):
+            for weight, mask in zip(weights, masks):
+                masker.apply(weight, mask, task)
+        application += time.perf_counter() - start
+    return creation / args.repeats, application / args.repeats
+
+
+def run(args):
+    torch.manual_seed(args.seed)
+    for tasks in args.tasks:
+        layers = get_layers(args, tasks)
+        for name, module in (
+            ("greedy", greedy),
+            ("probability", probability),
+            ("rescale", rescale),
+        ):
+            if name not in args.methods:
+                continue
+            creation, application = timed(args, module.Masker, layers, tasks)
+            print(
+                f"{name:>11} | tasks {tasks:>3} | create {creation * 1e3:9.2f} ms | "
+                f"apply (all tasks) {application * 1e3:9.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=4096)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[2, 10, 20, 50])
+    parser.add_argument("--labels", type=int, default=10)
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=["greedy", "probability", "rescale"],
+        choices=("greedy", "probability", "rescale"),
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    run(parser.parse_args())
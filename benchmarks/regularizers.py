@@ -0,0 +1,135 @@
+"""
+Benchmark exact spatial regularizers against their sampled (Monte-Carlo) estimates.
+
+For every layer width, reports wall-clock of forward and backward pass
+and spread of sampled estimates around exact value. Exact values and
+timings come from dense reference implementations; tiled proximity and
+transport (`nn.functional`) are timed as well for comparison.
+
+Run from repository root::
+
+    python benchmarks/regularizers.py --widths 512 2048 4096 --samples 4096
+
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import nn  # isort:skip
+
+
+def exact_proximity(positions, epsilon: float = 1e-8):
+    distances = positions.unsqueeze(0) - positions.unsqueeze(1)
+    distances = (distances.pow(2).sum(-1) + epsilon).sqrt()
+    return torch.exp(-distances).mean()
+
+
+def exact_transport(positions, previous_positions, weight, norm):
+    distances = positions.unsqueeze(1) - previous_positions.unsqueeze(0)
+    distances = distances.pow(2).sum(-1).sqrt()
+    return (distances * nn.functional._norm(weight, norm)).mean()
+
+
+def timed(function, *inputs, repeats: int):
+    """Mean wall-clock (seconds) of forward and backward pass of `function`."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*inputs).backward()
+    return (time.perf_counter() - start) / repeats
+
+
+def estimates(function, *inputs, repeats: int):
+    with torch.no_grad():
+        return torch.stack([function(*inputs) for _ in range(repeats)])
+
+
+def report(name, width, exact, sampled, exact_time, sampled_time):
+    print(
+        f"{name:<10} {width:>6} | exact: {exact:.6f} ({exact_time * 1000:8.2f} ms) | "
+        f"sampled: {sampled.mean():.6f} ± {sampled.std():.6f} "
+        f"(relative std {sampled.std() / exact:.4f}, {sampled_time * 1000:8.2f} ms)"
+    )
+
+
+def run(args):
+    torch.manual_seed(args.seed)
+    for width in args.widths:
+        positions = torch.randn(width, 2, requires_grad=True)
+        previous_positions = torch.randn(width, 2, requires_grad=True)
+        weight = torch.randn(width, width, requires_grad=True)
+
+        exact = exact_proximity(positions).item()
+        sampled = estimates(
+            nn.functional.sampled_proximity,
+            positions,
+            args.samples,
+            repeats=args.estimates,
+        )
+        tiled_time = timed(
+            nn.functional.proximity, positions, 1e-8, args.tile, repeats=args.repeats
+        )
+        print(f"{'tiled':<10} {width:>6} | tiled proximity: {tiled_time * 1000:8.2f} ms")
+        report(
+            "proximity",
+            width,
+            exact,
+            sampled,
+            timed(exact_proximity, positions, repeats=args.repeats),
+            timed(
+                nn.functional.sampled_proximity,
+                positions,
+                args.samples,
+                repeats=args.repeats,
+            ),
+        )
+
+        inputs = (positions, previous_positions, weight, args.norm)
+        exact = exact_transport(*inputs).item()
+        sampled = estimates(
+            nn.functional.sampled_transport,
+            *inputs,
+            args.samples,
+            repeats=args.estimates,
+        )
+        fused_time = timed(
+            nn.functional.transport, *inputs, args.tile, repeats=args.repeats
+        )
+        print(f"{'fused':<10} {width:>6} | tiled transport: {fused_time * 1000:8.2f} ms")
+        report(
+            "transport",
+            width,
+            exact,
+            sampled,
+            timed(exact_transport, *inputs, repeats=args.repeats),
+            timed(
+                nn.functional.sampled_transport,
+                *inputs,
+                args.samples,
+                repeats=args.repeats,
+            ),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widths", type=int, nargs="+", default=[512, 2048, 4096])
+    parser.add_argument("--samples", type=int, default=4096)
+    parser.add_argument("--tile", type=int, default=1024)
+    parser.add_argument("--norm", choices=("l1", "l2"), default="l2")
+    parser.add_argument(
+        "--estimates",
+        type=int,
+        default=100,
+        help="How many sampled estimates are used to measure variance.",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="How many passes are timed."
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    run(parser.parse_args())
@@ -1,3 +1,3 @@
-__all__ = ["datasets", "samplers"]
+__all__ = ["cache", "datasets", "samplers"]
 
-from . import datasets, samplers
+from . import cache, datasets, samplers
@@ -0,0 +1,148 @@
+"""
+This module provides datasets decoded once and kept as tensors.
+
+Images of each `torchvision` dataset are decoded into single contiguous
+`uint8` array (and labels into `int64` array), which is saved as `.npy` files
+under `root` directory and memory-mapped by every subsequent run
+(no matter the subcommand).
+
+Images are converted to `float` (just like `torchvision.transforms.ToTensor`)
+only when indexed, preferably in batches (see `Cached.gather`).
+
+"""
+
+import os
+import pathlib
+import warnings
+
+import numpy as np
+import torch
+import torchvision
+
+
+def get(root, name: str, train: bool):
+    """Return cached `torchvision` dataset, decode and save it if needed.
+
+    Parameters
+    ----------
+    root: str
+            Directory where datasets are downloaded. Cache is kept inside
+            `root/cache/{name}` directory.
+    name: str
+            Name of `torchvision.datasets` class, e.g. `MNIST`
+    train: bool
+            Whether to return training or validation part of dataset.
+
+    Returns
+    -------
+    Cached
+            Dataset backed by memory-mapped tensors.
+
+    """
+    directory = pathlib.Path(root) / "cache" / name
+    part = "train" if train else "test"
+    images_path = directory / f"{part}_images.npy"
+    labels_path = directory / f"{part}_labels.npy"
+    if not (images_path.exists() and labels_path.exists()):
+        images, labels = decode(
+            getattr(torchvision.datasets, name)(root, train=train, download=True)
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        _save(labels_path, labels)
+        _save(images_path, images)
+
+    return Cached(name, images_path, labels_path)
+
+
+def decode(dataset):
+    """Decode images of dataset (without transform) into `uint8` and labels into `int64` arrays.
+
+    Parameters
+    ----------
+    dataset: torch.utils.data.Dataset
+            Dataset returning `PIL.Image`, `int` pairs.
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+            Images of shape `(N, C, H, W)` and labels of shape `(N,)`
+
+    """
+    images, labels = None, np.empty(len(dataset), dtype=np.int64)
+    for index in range(len(dataset)):
+        image, label = dataset[index]
+        image = torchvision.transforms.functional.pil_to_tensor(image).numpy()
+        if images is None:
+            images = np.empty((len(dataset), *image.shape), dtype=np.uint8)
+        images[index] = image
+        labels[index] = label
+    return images, labels
+
+
+def _save(path, array) -> None:
+    """Save array so other processes never see partially written file."""
+    temporary = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(temporary, array)
+    os.replace(temporary, path)
+
+
+def _load(path) -> torch.Tensor:
+    """Memory-map saved array as read-only tensor."""
+    with warnings.catch_warnings():
+        # Array is read-only; tensor is never written to, only indexed.
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.from_numpy(np.load(path, mmap_mode="r"))
+
+
+class Cached(torch.utils.data.Dataset):
+    """Dataset keeping decoded images and labels as tensors.
+
+    Returns the same samples as `torchvision` dataset with
+    `transforms.ToTensor()`, but without decoding them each time.
+
+    Arrays are memory-mapped read-only, so only paths are pickled
+    (e.g. when sent to DataLoader workers) and every process shares
+    single copy of the pixels (page cache).
+
+    Parameters
+    ----------
+    name: str
+            Name of original dataset (used for display).
+    images_path: pathlib.Path
+            `.npy` file with `uint8` images of shape `(N, C, H, W)`
+    labels_path: pathlib.Path
+            `.npy` file with labels of shape `(N,)`
+
+    """
+
+    def __init__(self, name: str, images_path, labels_path):
+        self.name: str = name
+        self.images_path = images_path
+        self.labels_path = labels_path
+        self._map()
+
+    def _map(self):
+        self.images = _load(self.images_path)
+        self.labels = _load(self.labels_path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["images"], state["labels"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map()
+
+    def __getitem__(self, index):
+        return self.images[index].float().div_(255), int(self.labels[index])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def gather(self, indices):
+        """Return batch of normalized images and labels under `indices` tensor."""
+        return self.images[indices].float().div_(255), self.labels[indices]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name}, {tuple(self.images.shape)})"
@@ -1,3 +1,4 @@
+import itertools
 import typing
 
 import torch
@@ -59,10 +60,19 @@ class Sequential(torch.utils.data.IterableDataset):
     *datasets : torch.utils.data.Dataset
             Varargs containing datasets to be merged
 
+    Attributes
+    ----------
+    batch_size : int
+            If set, ready-made batches of this size are yielded instead of single
+            samples (last one may be smaller). Should be used with
+            `torch.utils.data.DataLoader` having `batch_size=None`.
+            Default: `None` (single samples)
+
     Yields
     ------
     Tensor, int
             Image, label pair from one of the datasets (exact scheme described by sampler).
+            If `batch_size` is set, batch of images and tensor of labels.
 
     """
 
@@ -70,6 +80,7 @@ class Sequential(torch.utils.data.IterableDataset):
         self.labels: int = labels
         self.sampler_class = sampler_class
         self.datasets = datasets
+        self.batch_size: int = None
 
         # lengths will be useful to know which dataset we are going to index.
         self.lengths = [0] + torch.cumsum(
@@ -81,7 +92,10 @@ class Sequential(torch.utils.data.IterableDataset):
         # Sampler has to be resetted after each full pass through data
         # Can be considered data shuffle
         self.reset()
-        for index in self._sampler:
+        if self.batch_size is not None:
+            yield from self._batches()
+            return
+        for index in _shard(self._sampler):
             # Which dataset should be queried now based on sampler
             # E.g. 0 for MNIST, 1 for Fashion-MNIST etc.
             dataset_index = next(i for i, v in enumerate(self.lengths) if v > index) - 1
@@ -94,11 +108,48 @@ class Sequential(torch.utils.data.IterableDataset):
             self._last_dataset = dataset_index
             yield image, label
 
+    def _chunks(self):
+        """Yield consecutive `batch_size` sampled indices as tensors."""
+        sampler = iter(self._sampler)
+        while True:
+            indices = torch.as_tensor(list(itertools.islice(sampler, self.batch_size)))
+            if len(indices) == 0:
+                return
+            yield indices
+
+    def _batches(self):
+        """Yield batches of images and labels gathered for `batch_size` sampled indices.
+
+        Dataset of each index is found by `torch.searchsorted` over `lengths`
+        and samples of each dataset are fetched at once (see `_gather`).
+
+        """
+        lengths = torch.tensor(self.lengths)
+        for indices in _shard(self._chunks()):
+            dataset_indices = torch.searchsorted(lengths, indices, right=True) - 1
+            images, labels = None, torch.empty_like(indices)
+            for dataset_index in dataset_indices.unique().tolist():
+                mask = dataset_indices == dataset_index
+                dataset_images, dataset_labels = _gather(
+                    self.datasets[dataset_index],
+                    indices[mask] - self.lengths[dataset_index],
+                )
+                if images is None:
+                    images = dataset_images.new_empty(
+                        (len(indices), *dataset_images.shape[1:])
+                    )
+                images[mask] = dataset_images
+                labels[mask] = dataset_labels + dataset_index * self.labels
+
+            self._last_label = labels
+            self._last_dataset = dataset_indices
+            yield images, labels
+
     def __len__(self):
         return sum(len(dataset) for dataset in self.datasets)
 
     def reset(self):
-        self._sampler = self.sampler_class(*self.datasets)
+        self._sampler = self.sampler_class(*self.datasets, generator=_generator())
 
     # Used in shape inference, shape of single sample (without labels)
     @property
@@ -117,10 +168,18 @@ class Sequential(torch.utils.data.IterableDataset):
         return image.unsqueeze(dim=0)
 
     # Below properties are used during recording of activations
+    # (tensors with value for each sample if `batch_size` is set)
     @property
     def label(self):
         return self._last_label
 
+    # Samples coming from DataLoader workers do not update main process dataset,
+    # label has to be set explicitly (dataset is inferred as `label // labels`)
+    @label.setter
+    def label(self, value):
+        self._last_label = value
+        self._last_dataset = value // self.labels
+
     @property
     def dataset(self):
         return self._last_dataset
@@ -130,6 +189,59 @@ class Sequential(torch.utils.data.IterableDataset):
         return len(self.datasets)
 
 
+def _generator():
+    """Return random generator seeded the same way in every DataLoader worker.
+
+    All workers of one epoch share `seed - id` (DataLoader's base seed),
+    hence their samplers produce identical order and `_shard` splits it
+    without overlap. In the main process global random state is used (`None`).
+
+    """
+    info = torch.utils.data.get_worker_info()
+    if info is None:
+        return None
+    return torch.Generator().manual_seed(info.seed - info.id)
+
+
+def _shard(iterable):
+    """Return elements of `iterable` belonging to current DataLoader worker.
+
+    Worker `i` out of `N` takes elements `i, i + N, i + 2N...`, which
+    DataLoader (fetching from workers in turn) yields in original order.
+
+    """
+    info = torch.utils.data.get_worker_info()
+    if info is None:
+        return iterable
+    return itertools.islice(iterable, info.id, None, info.num_workers)
+
+
+def _gather(dataset, indices):
+    """Return batch of images and labels of `dataset` under `indices`.
+
+    Datasets providing `gather(indices)` method (e.g. kept in memory as tensors)
+    are indexed with tensor directly, others are indexed sample by sample.
+
+    Parameters
+    ----------
+    dataset : torch.utils.data.Dataset
+            Dataset to be indexed
+    indices : torch.Tensor
+            1D tensor of indices into `dataset`
+
+    Returns
+    -------
+    Tensor, Tensor
+            Stacked images and labels
+
+    """
+    gather = getattr(dataset, "gather", None)
+    if gather is not None:
+        return gather(indices)
+    images, labels = zip(*(dataset[index] for index in indices.tolist()))
+    return torch.stack(images), torch.as_tensor(labels)
+
+
 class _JoinedDataset(torch.utils.data.IterableDataset):
     """Provide joined samples (by some, later to be specified, method).
 
@@ -151,10 +263,20 @@ class _JoinedDataset(torch.utils.data.IterableDataset):
     *datasets : torch.utils.data.Dataset
             Varargs containing datasets to be merged
 
+    Attributes
+    ----------
+    batch_size : int
+            If set, ready-made batches of this size are yielded instead of single
+            samples (last one may be smaller). Indices of whole batch are taken from
+            sampler at once (sampler has to provide `batches` method).
+            Should be used with `torch.utils.data.DataLoader` having `batch_size=None`.
+            Default: `None` (single samples)
+
     Yields
     ------
     Tensor, int
             Image, label pair from one of the datasets (exact scheme described by sampler).
+            If `batch_size` is set, batch of images and labels of shape `(batch, datasets)`.
 
     """
 
@@ -164,6 +286,7 @@ class _JoinedDataset(torch.utils.data.IterableDataset):
         self.labels: int = labels
         self.sampler_class = sampler_class
         self.datasets = datasets
+        self.batch_size: int = None
 
         self._length = max(map(len, datasets))
         self._operation = operation
@@ -171,7 +294,10 @@ class _JoinedDataset(torch.utils.data.IterableDataset):
     def __iter__(self):
         # Sampler has to be reinstantiated after each full pass through data in order to shuffle
         self.reset()
-        for indices in self._sampler:
+        if self.batch_size is not None:
+            yield from self._batches()
+            return
+        for indices in _shard(self._sampler):
             X, y = [], []
             for dataset, index in zip(self.datasets, indices):
                 sample = dataset[index]
@@ -181,11 +307,24 @@ class _JoinedDataset(torch.utils.data.IterableDataset):
             y %= self.labels
             yield self._operation(X), y
 
+    def _batches(self):
+        """Yield batches with images of each dataset gathered at once and joined by `operation`."""
+        for indices in _shard(self._sampler.batches(self.batch_size)):
+            X, y = zip(
+                *(
+                    _gather(dataset, dataset_indices)
+                    for dataset, dataset_indices in zip(self.datasets, indices.T)
+                )
+            )
+            y = torch.stack(y, dim=-1)
+            y %= self.labels
+            yield self._operation(X), y
+
     def __len__(self):
         return self._length
 
     def reset(self):
-        self._sampler = self.sampler_class(*self.datasets)
+        self._sampler = self.sampler_class(*self.datasets, generator=_generator())
 
 
 # Adding parameters like in real mix for each dataset?
@@ -215,10 +354,10 @@ class Mix(_JoinedDataset):
 
 
 class Stacked(_JoinedDataset):
-    """Joined dataset stacking images."""
+    """Joined dataset stacking images (along channels, also for batches)."""
 
     def __init__(self, labels: int, sampler, *datasets):
-        super().__init__(lambda X: torch.cat(X, dim=0), labels, sampler, *datasets)
+        super().__init__(lambda X: torch.cat(X, dim=-3), labels, sampler, *datasets)
 
     @property
     def shape(self):
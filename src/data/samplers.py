@@ -19,8 +19,8 @@ class DatasetRandomSampler(SubsetRandomSampler):
 
     """
 
-    def __init__(self, *datasets):
-        super().__init__(torch.arange(sum(map(len, datasets))))
+    def __init__(self, *datasets, generator=None):
+        super().__init__(torch.arange(sum(map(len, datasets))), generator=generator)
 
 
 # Iterate randomly over first dataset, after that randomly through the second and so on...
@@ -41,8 +41,10 @@ class TaskSampler(Sampler):
 
     """
 
-    def __init__(self, *datasets):
-        self.samplers = [RandomSampler(dataset) for dataset in datasets]
+    def __init__(self, *datasets, generator=None):
+        self.samplers = [
+            RandomSampler(dataset, generator=generator) for dataset in datasets
+        ]
         self._length = sum(len(sampler) for sampler in self.samplers)
         self._cumulative_lengths = [0] + torch.cumsum(
             torch.tensor([len(sampler) for sampler in self.samplers]), dim=0
@@ -80,28 +82,31 @@ class JoinedSampler(Sampler):
 
     """
 
+    def __init__(self, *datasets, generator=None):
+        self._length = max(map(len, datasets))
+        # Permutations generated upfront, shape: (length, datasets)
+        self.indices = torch.stack(
+            [
+                JoinedSampler._permutation(len(dataset), self._length, generator)
+                for dataset in datasets
+            ],
+            dim=-1,
+        )
+
     # Each dataset shorter than the longest will be upsampled so number of samples will be equal.
     # This may induce overfitting on some datasets and underfitting on others.
     @classmethod
-    def _with_replacement_except_for_longest(cls, dataset, longest):
-        if len(dataset) != longest:
-            return {"replacement": True, "num_samples": longest}
-        return {}
-
-    def __init__(self, *datasets):
-        self._length = max(map(len, datasets))
-        self.samplers = [
-            RandomSampler(
-                dataset,
-                **JoinedSampler._with_replacement_except_for_longest(
-                    dataset, self._length
-                )
-            )
-            for dataset in datasets
-        ]
+    def _permutation(cls, length, longest, generator):
+        if length != longest:
+            return torch.randint(length, (longest,), generator=generator)
+        return torch.randperm(length, generator=generator)
 
     def __iter__(self):
-        yield from zip(*self.samplers)
+        yield from map(tuple, self.indices.tolist())
+
+    def batches(self, batch_size: int):
+        """Yield tensors of shape `(batch_size, datasets)` with indices into each dataset."""
+        yield from self.indices.split(batch_size)
 
     def __len__(self):
         return self._length
@@ -20,7 +20,89 @@ def validate_spatial_locations(args):
             )
 
 
+def validate_proximity_approximation(args):
+    if args.command == "train":
+        if args.cutoff is not None and args.cutoff <= 0:
+            raise ValueError("--cutoff has to be greater than zero.")
+        if args.tile is not None and args.tile < 1:
+            raise ValueError("--tile has to be one or greater.")
+        for flag, samples in (
+            ("--proximity-samples", args.proximity_samples),
+            ("--transport-samples", args.transport_samples),
+        ):
+            if samples is not None and any(value < 1 for value in samples):
+                raise ValueError(f"{flag} has to be one or greater.")
+        if args.rebuild_every < 1:
+            raise ValueError("--rebuild-every has to be one or greater.")
+        if args.regularize_every < 1:
+            raise ValueError("--regularize-every has to be one or greater.")
+
+
+def validate_compiled_loss(args):
+    if args.command == "train" and args.compile_loss:
+        if (
+            args.cutoff is not None
+            or args.proximity_samples is not None
+            or args.transport_samples is not None
+            or args.batched_penalties
+            or args.tile is not None
+        ):
+            raise ValueError(
+                "--compile-loss computes exact losses, "
+                "it cannot be used with --cutoff, --proximity-samples, --transport-samples, "
+                "--batched-penalties or --tile."
+            )
+
+
+def validate_workers(args):
+    if (
+        args.command in ("train", "record", "plot", "score", "split")
+        and args.workers < 0
+    ):
+        raise ValueError("--workers cannot be negative.")
+    if args.command in ("train", "score") and args.prefetch < 0:
+        raise ValueError("--prefetch cannot be negative.")
+
+
+def validate_record(args):
+    if args.command == "record" and args.batch < 1:
+        raise ValueError("--batch has to be one or greater.")
+    if args.command == "record" and args.reduction == "quantiles":
+        if any(not 0 <= quantile <= 1 for quantile in args.quantiles):
+            raise ValueError("--quantiles have to be within [0, 1] range.")
+        if args.bins < 2 or args.bins % 2:
+            raise ValueError("--bins has to be even and greater than zero.")
+
+
+def validate_split(args):
+    if args.command == "split":
+        if "activations" in args.method and args.data is None:
+            raise ValueError("--data has to be specified for --method activations.")
+        if args.where is not None and any(
+            index < 0 for where in args.where for index in where
+        ):
+            raise ValueError(
+                "Only indices zero or greater can be specified in --where flag."
+            )
+
+
+def validate_plot(args):
+    if args.command == "plot":
+        if args.data is None and args.model is None:
+            raise ValueError("At least one of --data or --model has to be specified.")
+        if args.model is not None and args.color == "activations" and args.data is None:
+            raise ValueError("--data has to be specified for --color activations.")
+        if args.resolution < 1:
+            raise ValueError("--resolution has to be one or greater.")
+
+
 def process_arguments(args):
     validate_spatial_arguments(args)
+    validate_proximity_approximation(args)
+    validate_compiled_loss(args)
+    validate_workers(args)
+    validate_record(args)
+    validate_split(args)
+    validate_plot(args)
     # validate_spatial_locations(args)
     return args
@@ -35,6 +35,36 @@ def train(subparsers) -> None:
         help="Where downloaded datasets will be saved. By default inside your temporary folder.",
     )
 
+    subparser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        default=True,
+        help="Decode images with torchvision each time instead of using cache.\n"
+        "By default each dataset is decoded once into uint8 tensors saved inside '--root'\n"
+        "(memory-mapped and shared by train, record and score).",
+    )
+
+    subparser.add_argument(
+        "--workers",
+        required=False,
+        default=0,
+        type=int,
+        help="How many DataLoader worker processes load data (each takes its own part of every epoch).\n"
+        "Cached datasets are memory-mapped, so all workers share single copy of images.\n"
+        "Default: 0 (data loaded in the main process)",
+    )
+
+    subparser.add_argument(
+        "--prefetch",
+        required=False,
+        default=0,
+        type=int,
+        help="How many batches are loaded ahead by background thread (moved to GPU on separate\n"
+        "CUDA stream if --cuda), so data loading overlaps with computation.\n"
+        "Default: 0 (no prefetching)",
+    )
+
     subparser.add_argument(
         "--layers",
         required=True,
@@ -128,6 +158,88 @@ def train(subparsers) -> None:
         default="l2",
     )
 
+    subparser.add_argument(
+        "--tile",
+        required=False,
+        default=None,
+        type=int,
+        help="How many neurons are processed at once by proximity and transport losses.\n"
+        "Pairwise distances are computed in blocks of this size, hence memory grows linearly with layer's width.\n"
+        "Default: 1024",
+    )
+
+    subparser.add_argument(
+        "--cutoff",
+        required=False,
+        default=None,
+        type=float,
+        help="If specified, proximity loss is approximated using only pairs of neurons closer than cutoff.\n"
+        "Neurons are bucketed into uniform grid, so distant pairs are never compared.\n"
+        "Default: None (exact proximity loss)",
+    )
+
+    subparser.add_argument(
+        "--rebuild-every",
+        required=False,
+        default=10,
+        type=int,
+        help="Every how many steps pairs of neighbouring neurons are found anew.\n"
+        "Only used when --cutoff is specified.\n"
+        "Default: 10",
+    )
+
+    subparser.add_argument(
+        "--proximity-samples",
+        required=False,
+        default=None,
+        type=int,
+        nargs="+",
+        help="If specified, proximity loss is estimated from this many randomly drawn pairs of neurons.\n"
+        "Either single value (used for every layer) or one value per '--where' layer.\n"
+        "Takes precedence over --cutoff.\n"
+        "Default: None (exact proximity loss)",
+    )
+
+    subparser.add_argument(
+        "--transport-samples",
+        required=False,
+        default=None,
+        type=int,
+        nargs="+",
+        help="If specified, transport loss is estimated from this many randomly drawn connections.\n"
+        "Either single value (used for every layer) or one value per '--where' layer.\n"
+        "Default: None (exact transport loss)",
+    )
+
+    subparser.add_argument(
+        "--regularize-every",
+        required=False,
+        default=1,
+        type=int,
+        help="Apply proximity and transport losses only every k-th training step.\n"
+        "Penalties are scaled by k on those steps (like gradient accumulation); other steps\n"
+        "use cross entropy only. Validation always uses unscaled penalties. Default: 1 (each step)",
+    )
+
+    subparser.add_argument(
+        "--batched-penalties",
+        required=False,
+        default=False,
+        action="store_true",
+        help="Calculate exact proximity and transport losses of all spatial layers together\n"
+        "(padded to the widest layer) with a few vectorized operations instead of one layer at a time.",
+    )
+
+    subparser.add_argument(
+        "--compile-loss",
+        required=False,
+        default=False,
+        action="store_true",
+        help="Compute cross entropy, proximity and transport losses with single compiled function\n"
+        "(torch.compile if available, torch.jit.script otherwise) so their kernels can be fused.\n"
+        "Losses are always exact; cannot be used with --cutoff or sampling options.",
+    )
+
 
 def record(subparsers) -> None:
     subparser = subparsers.add_parser(
@@ -164,13 +276,35 @@ def record(subparsers) -> None:
     subparser.add_argument(
         "--reduction",
         required=True,
-        choices=("mean", "variance"),
+        choices=("mean", "variance", "quantiles", "sparsity"),
         type=str.lower,
         help="What reduction to use. Available options:\n"
         """- "Mean"\n- "Variance"\n"""
+        """- "Quantiles" (see --quantiles, estimated from streaming histograms)\n"""
+        """- "Sparsity" (fraction of samples for which activation is exactly zero)\n"""
         "This option is case insensitive.",
     )
 
+    subparser.add_argument(
+        "--quantiles",
+        required=False,
+        default=[0.5, 0.9, 0.99],
+        type=float,
+        nargs="+",
+        help="Quantiles of each neuron's activations saved by 'quantiles' reduction.\n"
+        "Default: [0.5, 0.9, 0.99]",
+    )
+
+    subparser.add_argument(
+        "--bins",
+        required=False,
+        default=256,
+        type=int,
+        help="Number of histogram bins per neuron (and task) used by 'quantiles' reduction.\n"
+        "Has to be even; memory of each layer is tasks * neurons * bins.\n"
+        "Default: 256",
+    )
+
     subparser.add_argument(
         "--save",
         required=True,
@@ -178,6 +312,16 @@ def record(subparsers) -> None:
         "Folder should be provided, structure will be created automatically.",
     )
 
+    subparser.add_argument(
+        "--batch",
+        required=False,
+        default=256,
+        type=int,
+        help="How many samples are passed through network at once.\n"
+        "Samples of different tasks can share a batch (recorded separately).\n"
+        "Default: 256",
+    )
+
     subparser.add_argument(
         "--task",
         default=False,
@@ -204,9 +348,31 @@ def record(subparsers) -> None:
         help="Where downloaded datasets will be saved. By default inside your temporary folder.",
     )
 
+    subparser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        default=True,
+        help="Decode images with torchvision each time instead of using cache.\n"
+        "By default each dataset is decoded once into uint8 tensors saved inside '--root'\n"
+        "(memory-mapped and shared by train, record and score).",
+    )
+
+    subparser.add_argument(
+        "--workers",
+        required=False,
+        default=0,
+        type=int,
+        help="How many DataLoader worker processes load data (each takes its own part of every epoch).\n"
+        "Cached datasets are memory-mapped, so all workers share single copy of images.\n"
+        "Default: 0 (data loaded in the main process)",
+    )
+
 
 def plot(subparsers) -> None:
-    subparser = subparsers.add_parser("plot", help="Plot recorded activations.")
+    subparser = subparsers.add_parser(
+        "plot", help="Plot recorded activations and neuron positions of a model."
+    )
     subparser.add_argument(
         "--data",
         default=None,
@@ -222,10 +388,39 @@ def plot(subparsers) -> None:
         help="Path to model whose spatial parameters will be plotted.",
     )
 
+    subparser.add_argument(
+        "--color",
+        required=False,
+        default="task",
+        choices=("task", "activations"),
+        type=str.lower,
+        help="How neuron positions of --model are colored: by task assigned to neurons "
+        "(greedy, like split does) or by recorded activations (--data has to be specified). "
+        "Default: task",
+    )
+
+    subparser.add_argument(
+        "--resolution",
+        required=False,
+        default=256,
+        type=int,
+        help="Maximal number of bins (per axis) neuron positions of each layer are divided into. "
+        "Smaller layers use fewer bins. Default: 256",
+    )
+
     subparser.add_argument(
         "--save", required=True, help="Path where generated plots will be saved."
     )
 
+    subparser.add_argument(
+        "--workers",
+        required=False,
+        default=0,
+        type=int,
+        help="How many processes render figures in parallel (one task per process). "
+        "Default: 0 (figures rendered in the main process)",
+    )
+
 
 def split(subparsers) -> None:
     subparser = subparsers.add_parser(
@@ -239,8 +434,10 @@ def split(subparsers) -> None:
         required=True,
         choices=("activations", "greedy", "rescale", "probability"),
         type=str.lower,
-        help="Method to split neural network.\n"
-        "Available options:\n-'Activations' (to be fixed)\n-'Greedy'\n-'Rescale'\n-'Probability'\n"
+        nargs="+",
+        help="Method(s) to split neural network.\n"
+        "Available options:\n-'Activations'\n-'Greedy'\n-'Rescale'\n-'Probability'\n"
+        "Multiple methods can be specified to run a sweep.\n"
         "Option is case insensitive.",
     )
 
@@ -250,7 +447,29 @@ def split(subparsers) -> None:
         default=None,
         type=int,
         nargs="+",
+        action="append",
         help="Indices of linear modules that will be split.\n"
+        "Can be specified multiple times (e.g. '--where 0 1 --where 1 2') to run a sweep.\n"
+        "Default: all spatial modules",
+    )
+
+    subparser.add_argument(
+        "--seeds",
+        required=False,
+        default=None,
+        type=int,
+        nargs="+",
+        help="Seeds used to create masks of stochastic methods ('Rescale', 'Probability').\n"
+        "Each seed is a separate variant of a sweep. Default: no explicit seed",
+    )
+
+    subparser.add_argument(
+        "--workers",
+        required=False,
+        default=0,
+        type=int,
+        help="How many processes create masks of sweep variants in parallel.\n"
+        "Default: 0 (masks created in the main process)",
     )
 
     subparser.add_argument(
@@ -261,12 +480,32 @@ def split(subparsers) -> None:
         "Specify only if Activations used.",
     )
 
+    subparser.add_argument(
+        "--mmap",
+        action="store_true",
+        default=False,
+        help="Memory-map recorded activations instead of reading them into memory.\n"
+        "Only one layer of one task is processed at a time either way.\n"
+        "Used only by Activations method.",
+    )
+
     subparser.add_argument("--model", required=True, help="Path to saved model.")
 
     subparser.add_argument(
         "--save",
         required=True,
-        help="Path (folder) where generated models will be saved.",
+        help="Path (folder) where generated models will be saved.\n"
+        "For a sweep (more than one method, seed or '--where'), each variant is saved\n"
+        "in its own subfolder and 'variants.json' summarizes all of them.",
+    )
+
+    subparser.add_argument(
+        "--prune",
+        action="store_true",
+        default=False,
+        help="Additionally save per-task models with dead neurons removed\n"
+        "(inside 'pruned' subfolder of '--save', can be passed to score as '--models').\n"
+        "Pruned models compute the same outputs as masked ones using smaller layers.",
     )
 
 
@@ -343,3 +582,33 @@ def score(subparsers) -> None:
         default=tempfile.gettempdir(),
         help="Where downloaded datasets will be saved. By default inside your temporary folder.",
     )
+
+    subparser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        default=True,
+        help="Decode images with torchvision each time instead of using cache.\n"
+        "By default each dataset is decoded once into uint8 tensors saved inside '--root'\n"
+        "(memory-mapped and shared by train, record and score).",
+    )
+
+    subparser.add_argument(
+        "--workers",
+        required=False,
+        default=0,
+        type=int,
+        help="How many DataLoader worker processes load data (each takes its own part of every epoch).\n"
+        "Cached datasets are memory-mapped, so all workers share single copy of images.\n"
+        "Default: 0 (data loaded in the main process)",
+    )
+
+    subparser.add_argument(
+        "--prefetch",
+        required=False,
+        default=0,
+        type=int,
+        help="How many batches are loaded ahead by background thread (moved to GPU on separate\n"
+        "CUDA stream if --cuda), so data loading overlaps with computation.\n"
+        "Default: 0 (no prefetching)",
+    )
@@ -1,3 +1,3 @@
-__all__ = ["loss", "layers", "models", "callbacks", "metrics", "train", "optimizer", "passes"]
+__all__ = ["loss", "layers", "models", "callbacks", "metrics", "train", "optimizer", "passes", "functional"]
 
-from . import callbacks, layers, loss, metrics, models, optimizer, train, passes
+from . import callbacks, functional, layers, loss, metrics, models, optimizer, train, passes
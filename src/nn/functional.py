@@ -0,0 +1,714 @@
+"""
+This module contains functional kernels used by spatial regularizers (see `nn.loss`).
+
+Kernels operate on raw tensors (positions of neurons, weights) instead of modules,
+so they can be reused by different loss implementations.
+
+"""
+
+import itertools
+import typing
+
+import torch
+
+
+def _blocks(size: int, tile: int):
+    """Yield consecutive slices of `[0, size)` range, each at most `tile` long.
+
+    If `tile` is `None`, single slice spanning whole range is returned.
+
+    """
+    if tile is None:
+        tile = size
+    for start in range(0, size, tile):
+        yield slice(start, start + tile)
+
+
+def _off_diagonal(block: slice, size: int, device):
+    """Mask of shape `(rows of block, size)`, `False` for pairs of neuron with itself.
+
+    Self-pairs contribute exactly zero to gradient of proximity, but their
+    `exp(-distance) / distance` weight is huge (distance is `sqrt(epsilon)`)
+    and would only be cancelled out later, losing precision.
+
+    """
+    rows = torch.arange(block.start, min(block.stop, size), device=device)
+    return rows.unsqueeze(1) != torch.arange(size, device=device).unsqueeze(0)
+
+
+def _weighted_differences(weights, first, second):
+    """Sum of `weights[..., i, j] * (first[..., i, :] - second[..., j, :])` over `j`.
+
+    Equal to `weights.sum(-1, keepdim=True) * first - weights @ second`, but
+    differences are taken before summation (dimension by dimension, so no
+    `(*, N, M, D)` tensor is created) and large, nearly equal terms are never
+    subtracted from each other, which keeps float32 precision.
+
+    """
+    return torch.stack(
+        [
+            (
+                weights
+                * (
+                    first[..., dimension : dimension + 1]
+                    - second[..., dimension].unsqueeze(-2)
+                )
+            ).sum(dim=-1)
+            for dimension in range(first.shape[-1])
+        ],
+        dim=-1,
+    )
+
+
+def _norm(weight, norm: str):
+    """Either absolute value (`"l1"`) or square (`"l2"`) of `weight`."""
+    if norm.lower() == "l1":
+        return torch.abs(weight)
+    if norm.lower() == "l2":
+        return torch.pow(weight, 2)
+    raise ValueError("Unsupported weight norm. One of L1/L2 available.")
+
+
+def _norm_derivative(weight, norm: str):
+    """Derivative of `_norm` with respect to `weight`."""
+    if norm.lower() == "l1":
+        return torch.sign(weight)
+    return 2 * weight
+
+
+def _kernels(weight):
+    """View weight of shape `(out, in, *kernel_size)` as `(out, in, kernel)`."""
+    return weight.view(weight.shape[0], weight.shape[1], -1)
+
+
+def _check_connections(positions, previous_positions, weight) -> None:
+    if weight.shape[:2] != (positions.shape[0], previous_positions.shape[0]):
+        raise ValueError(
+            f"Weight of shape {tuple(weight.shape)} does not connect {positions.shape[0]} "
+            f"neurons with {previous_positions.shape[0]} neurons of previous spatial layer. "
+            "Grouped convolutions are not supported by transport penalty."
+        )
+
+
+def _distances(first, second, epsilon: float):
+    """Euclidean distances between rows of `first` and `second`.
+
+    Leading (batch) dimensions of both tensors have to be equal.
+
+    Parameters
+    ----------
+    first: torch.Tensor
+            Positions of shape `(*, N, D)`
+    second: torch.Tensor
+            Positions of shape `(*, M, D)`
+    epsilon: float
+            Small value added before square root is taken.
+
+    Returns
+    -------
+    torch.Tensor
+            Distances of shape `(*, N, M)`
+
+    """
+    # Accumulated dimension by dimension, so no (N, M, D) tensor is created
+    distances = (first[..., 0:1] - second[..., 0].unsqueeze(-2)).pow_(2)
+    for dimension in range(1, first.shape[-1]):
+        distances += (
+            first[..., dimension : dimension + 1] - second[..., dimension].unsqueeze(-2)
+        ).pow_(2)
+    return distances.add_(epsilon).sqrt_()
+
+
+class _Proximity(torch.autograd.Function):
+    """Mean of `exp(-distance)` over all pairs of neurons computed in tiles.
+
+    Neither forward nor backward keeps the `(N, N)` distance matrix;
+    distances are recomputed block by block, hence peak memory is `O(tile * N)`.
+
+    """
+
+    @staticmethod
+    def forward(ctx, positions, epsilon, tile):
+        ctx.save_for_backward(positions)
+        ctx.epsilon, ctx.tile = epsilon, tile
+
+        total = positions.new_zeros(())
+        for block in _blocks(positions.shape[0], tile):
+            total += torch.exp(-_distances(positions[block], positions, epsilon)).sum()
+        return total / positions.shape[0] ** 2
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        (positions,) = ctx.saved_tensors
+        gradient = torch.empty_like(positions)
+        # Each pair appears twice (i, j) and (j, i), hence 2
+        scale = -2 * grad_output / positions.shape[0] ** 2
+        for block in _blocks(positions.shape[0], ctx.tile):
+            distances = _distances(positions[block], positions, ctx.epsilon)
+            weights = torch.where(
+                _off_diagonal(block, positions.shape[0], positions.device),
+                torch.exp(-distances) / distances,
+                torch.zeros_like(distances),
+            )
+            gradient[block] = scale * _weighted_differences(
+                weights, positions[block], positions
+            )
+        return gradient, None, None
+
+
+def proximity(positions, epsilon: float = 1e-8, tile: int = None):
+    """Mean of `exp(-distance)` between every pair of neurons.
+
+    Equal to (but without materializing `(N, N, D)` and `(N, N)` tensors)::
+
+        distances = positions.unsqueeze(0) - positions.unsqueeze(1)
+        distances = (distances.pow(2).sum(-1) + epsilon).sqrt()
+        torch.exp(-distances).mean()
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of shape `(N, D)`
+    epsilon: float, optional
+            Small non-zero value in rare case distance is too small to
+            have `sqrt` taken from it. Default: `1e-8`
+    tile: int, optional
+            How many neurons are processed at once. Peak memory grows like
+            `tile * N`. If `None`, all neurons are processed at once. Default: `None`
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with proximity penalty
+
+    """
+    return _Proximity.apply(positions, epsilon, tile)
+
+
+class _Transport(torch.autograd.Function):
+    """Mean of `distance * norm(weight)` over all connections computed in tiles.
+
+    `(out, in)` distance matrix is never materialized as a whole and is not kept
+    for backward pass; it is recomputed block by block from positions instead.
+
+    Weight is viewed as `(out, in, kernel)` (`kernel` is `1` for linear layers),
+    connection strength between channels is the sum of normed kernel elements.
+
+    """
+
+    @staticmethod
+    def forward(ctx, positions, previous_positions, weight, norm, tile):
+        ctx.save_for_backward(positions, previous_positions, weight)
+        ctx.norm, ctx.tile = norm, tile
+
+        kernels = _kernels(weight)
+        total = weight.new_zeros(())
+        for block in _blocks(weight.shape[0], tile):
+            distances = _distances(positions[block], previous_positions, 0.0)
+            total += (distances * _norm(kernels[block], norm).sum(dim=-1)).sum()
+        return total / weight.numel()
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        positions, previous_positions, weight = ctx.saved_tensors
+        scale = grad_output / weight.numel()
+
+        kernels = _kernels(weight)
+        positions_gradient = torch.empty_like(positions)
+        previous_gradient = torch.zeros_like(previous_positions)
+        weight_gradient = torch.empty_like(kernels)
+        for block in _blocks(weight.shape[0], ctx.tile):
+            distances = _distances(positions[block], previous_positions, 0.0)
+            weight_gradient[block] = (
+                scale
+                * distances.unsqueeze(-1)
+                * _norm_derivative(kernels[block], ctx.norm)
+            )
+            # d(distance)/d(position) is (difference / distance), zero if both coincide
+            coefficients = torch.where(
+                distances > 0,
+                _norm(kernels[block], ctx.norm).sum(dim=-1) / distances,
+                torch.zeros_like(distances),
+            )
+            positions_gradient[block] = scale * (
+                coefficients.sum(dim=1, keepdim=True) * positions[block]
+                - coefficients @ previous_positions
+            )
+            previous_gradient += scale * (
+                coefficients.sum(dim=0).unsqueeze(1) * previous_positions
+                - coefficients.T @ positions[block]
+            )
+        return (
+            positions_gradient,
+            previous_gradient,
+            weight_gradient.view_as(weight),
+            None,
+            None,
+        )
+
+
+def transport(positions, previous_positions, weight, norm: str, tile: int = None):
+    """Mean of `distance * norm(weight)` over all connections between two layers.
+
+    Equal to (but without materializing `(out, in, D)` and `(out, in)` tensors)::
+
+        distances = positions.unsqueeze(1) - previous_positions.unsqueeze(0)
+        distances = distances.pow(2).sum(-1).sqrt()
+        (distances * norm(weight)).mean()
+
+    For convolutions distance between channels is broadcast over each kernel element,
+    which is the same as weighting it by mean normed kernel.
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of current layer of shape `(out, D)`
+    previous_positions: torch.Tensor
+            Positions of neurons of previous spatial layer of shape `(in, D)`
+    weight: torch.Tensor
+            Weight of current layer of shape `(out, in)` or `(out, in, *kernel_size)`
+    norm: str
+            Either "l1" or "l2" (case insensitive), representing LP norm to be used.
+    tile: int, optional
+            How many output neurons are processed at once. Peak memory grows like
+            `tile * in`. If `None`, all neurons are processed at once. Default: `None`
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with transport penalty
+
+    """
+    _check_connections(positions, previous_positions, weight)
+    return _Transport.apply(positions, previous_positions, weight, norm, tile)
+
+
+def _pad(tensors):
+    """Stack tensors of different shapes into one, padding them with zeros at the end.
+
+    Returns
+    -------
+    Tuple[torch.Tensor, torch.Tensor]
+            Padded tensor of shape `(len(tensors), *max_shape)` and sizes of
+            each tensor along first dimension.
+
+    """
+    shape = [max(sizes) for sizes in zip(*(tensor.shape for tensor in tensors))]
+    padded = torch.stack(
+        [
+            torch.nn.functional.pad(
+                tensor,
+                [
+                    padding
+                    for dimension in reversed(range(tensor.dim()))
+                    for padding in (0, shape[dimension] - tensor.shape[dimension])
+                ],
+            )
+            for tensor in tensors
+        ]
+    )
+    sizes = torch.tensor([tensor.shape[0] for tensor in tensors], device=padded.device)
+    return padded, sizes
+
+
+def _valid(sizes, length: int):
+    """Mask of shape `(len(sizes), length)`, `True` for non-padded elements."""
+    return torch.arange(length, device=sizes.device).unsqueeze(0) < sizes.unsqueeze(1)
+
+
+class _BatchedProximity(torch.autograd.Function):
+    """`_Proximity` of many layers at once; positions are padded to the widest layer."""
+
+    @staticmethod
+    def forward(ctx, positions, sizes, epsilon, tile):
+        ctx.save_for_backward(positions, sizes)
+        ctx.epsilon, ctx.tile = epsilon, tile
+
+        valid = _valid(sizes, positions.shape[1]).to(positions.dtype)
+        total = positions.new_zeros(positions.shape[0])
+        for block in _blocks(positions.shape[1], tile):
+            distances = _distances(positions[:, block], positions, epsilon)
+            pairs = valid[:, block].unsqueeze(-1) * valid.unsqueeze(1)
+            total += (torch.exp(-distances) * pairs).sum(dim=(1, 2))
+        return total / sizes.to(positions.dtype) ** 2
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        positions, sizes = ctx.saved_tensors
+        valid = _valid(sizes, positions.shape[1]).to(positions.dtype)
+        gradient = torch.empty_like(positions)
+        scale = (-2 * grad_output / sizes.to(positions.dtype) ** 2).view(-1, 1, 1)
+        for block in _blocks(positions.shape[1], ctx.tile):
+            distances = _distances(positions[:, block], positions, ctx.epsilon)
+            pairs = valid[:, block].unsqueeze(-1) * valid.unsqueeze(1)
+            weights = torch.where(
+                _off_diagonal(block, positions.shape[1], positions.device),
+                torch.exp(-distances) / distances * pairs,
+                torch.zeros_like(distances),
+            )
+            gradient[:, block] = scale * _weighted_differences(
+                weights, positions[:, block], positions
+            )
+        return gradient, None, None, None
+
+
+def batched_proximity(positions, epsilon: float = 1e-8, tile: int = None):
+    """`proximity` of multiple layers calculated with a few vectorized operations.
+
+    Positions of all layers are padded to the widest one and processed
+    together in `(layers, tile, N)` blocks. Useful when many small penalties
+    would otherwise be calculated one by one.
+
+    Parameters
+    ----------
+    positions: List[torch.Tensor]
+            Positions of neurons of each layer, each of shape `(N_i, D)`
+    epsilon: float, optional
+            Small non-zero value in rare case distance is too small to
+            have `sqrt` taken from it. Default: `1e-8`
+    tile: int, optional
+            How many neurons of each layer are processed at once.
+            If `None`, all neurons are processed at once. Default: `None`
+
+    Returns
+    -------
+    torch.Tensor
+            Proximity penalty of each layer of shape `(len(positions),)`
+
+    """
+    padded, sizes = _pad(positions)
+    return _BatchedProximity.apply(padded, sizes, epsilon, tile)
+
+
+class _BatchedTransport(torch.autograd.Function):
+    """Mean of `distance * strength` of many layers computed in tiles.
+
+    `strength` is `(layers, out, in)` padded connection strength (normed weights
+    summed over kernel), positions and previous positions are padded as well.
+
+    """
+
+    @staticmethod
+    def forward(ctx, positions, previous_positions, strength, elements, tile):
+        ctx.save_for_backward(positions, previous_positions, strength, elements)
+        ctx.tile = tile
+
+        total = strength.new_zeros(strength.shape[0])
+        for block in _blocks(strength.shape[1], tile):
+            distances = _distances(positions[:, block], previous_positions, 0.0)
+            total += (distances * strength[:, block]).sum(dim=(1, 2))
+        return total / elements
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        positions, previous_positions, strength, elements = ctx.saved_tensors
+        scale = (grad_output / elements).view(-1, 1, 1)
+
+        positions_gradient = torch.empty_like(positions)
+        previous_gradient = torch.zeros_like(previous_positions)
+        strength_gradient = torch.empty_like(strength)
+        for block in _blocks(strength.shape[1], ctx.tile):
+            distances = _distances(positions[:, block], previous_positions, 0.0)
+            strength_gradient[:, block] = scale * distances
+            # Padded connections have zero strength, hence do not contribute
+            coefficients = torch.where(
+                distances > 0,
+                strength[:, block] / distances,
+                torch.zeros_like(distances),
+            )
+            positions_gradient[:, block] = scale * (
+                coefficients.sum(dim=-1, keepdim=True) * positions[:, block]
+                - torch.bmm(coefficients, previous_positions)
+            )
+            previous_gradient += scale * (
+                coefficients.sum(dim=1).unsqueeze(-1) * previous_positions
+                - torch.bmm(coefficients.transpose(1, 2), positions[:, block])
+            )
+        return positions_gradient, previous_gradient, strength_gradient, None, None
+
+
+def batched_transport(
+    positions, previous_positions, weights, norm: str, tile: int = None
+):
+    """`transport` of multiple layers calculated with a few vectorized operations.
+
+    Connection strengths (normed weights summed over kernels) and positions
+    of all layers are padded to the largest ones and processed together.
+
+    Parameters
+    ----------
+    positions: List[torch.Tensor]
+            Positions of neurons of each layer, each of shape `(out_i, D)`
+    previous_positions: List[torch.Tensor]
+            Positions of neurons of previous spatial layer of each layer,
+            each of shape `(in_i, D)`
+    weights: List[torch.Tensor]
+            Weight of each layer of shape `(out_i, in_i)` or `(out_i, in_i, *kernel_size)`
+    norm: str
+            Either "l1" or "l2" (case insensitive), representing LP norm to be used.
+    tile: int, optional
+            How many output neurons of each layer are processed at once.
+            If `None`, all neurons are processed at once. Default: `None`
+
+    Returns
+    -------
+    torch.Tensor
+            Transport penalty of each layer of shape `(len(positions),)`
+
+    """
+    for layer_positions, layer_previous, weight in zip(
+        positions, previous_positions, weights
+    ):
+        _check_connections(layer_positions, layer_previous, weight)
+
+    strength, _ = _pad(
+        [_norm(_kernels(weight), norm).sum(dim=-1) for weight in weights]
+    )
+    elements = strength.new_tensor([weight.numel() for weight in weights])
+    return _BatchedTransport.apply(
+        _pad(positions)[0], _pad(previous_positions)[0], strength, elements, tile
+    )
+
+
+def neighbours(positions, cutoff: float):
+    """Find all pairs of neurons closer to each other than `cutoff`.
+
+    Positions are bucketed into uniform grid with cell size equal to `cutoff`,
+    so only neurons from the same or adjacent cells are compared.
+    Each pair is returned in both orders, pairs `(i, i)` are included as well.
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of shape `(N, D)`
+    cutoff: float
+            Maximum distance between neurons forming a pair.
+
+    Returns
+    -------
+    Tuple[torch.Tensor, torch.Tensor]
+            Indices of first and second neuron of each pair.
+
+    """
+    with torch.no_grad():
+        cells = torch.floor(positions / cutoff).long()
+        # Margin of one cell on each side so neighbouring cells have valid keys
+        cells = cells - cells.min(dim=0).values + 1
+        extents = cells.max(dim=0).values + 2
+        strides = torch.cat(
+            (extents.new_ones(1), torch.cumprod(extents, dim=0)[:-1])
+        )
+
+        keys = (cells * strides).sum(dim=-1)
+        sorted_keys, order = torch.sort(keys)
+
+        rows, columns = [], []
+        for offset in itertools.product((-1, 0, 1), repeat=positions.shape[1]):
+            neighbour_keys = keys + (cells.new_tensor(offset) * strides).sum()
+            start = torch.searchsorted(sorted_keys, neighbour_keys)
+            counts = (
+                torch.searchsorted(sorted_keys, neighbour_keys, right=True) - start
+            )
+            # Position of each pair within range of its cell
+            shifts = torch.arange(
+                counts.sum(), device=positions.device
+            ) - torch.repeat_interleave(torch.cumsum(counts, dim=0) - counts, counts)
+            rows.append(
+                torch.repeat_interleave(
+                    torch.arange(len(positions), device=positions.device), counts
+                )
+            )
+            columns.append(order[torch.repeat_interleave(start, counts) + shifts])
+
+        rows, columns = torch.cat(rows), torch.cat(columns)
+        close = (positions[rows] - positions[columns]).pow(2).sum(-1) < cutoff ** 2
+        return rows[close], columns[close]
+
+
+def sparse_proximity(positions, rows, columns, epsilon: float = 1e-8):
+    """Approximate `proximity` using only specified pairs of neurons.
+
+    Pairs are usually obtained by `neighbours`. As `exp(-distance)` decays fast,
+    omitted distant pairs contribute almost nothing to the penalty.
+    Mean is taken over all `N * N` pairs, so result is comparable with `proximity`.
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of shape `(N, D)`
+    rows: torch.Tensor
+            Indices of first neuron of each pair.
+    columns: torch.Tensor
+            Indices of second neuron of each pair.
+    epsilon: float, optional
+            Small non-zero value in rare case distance is too small to
+            have `sqrt` taken from it. Default: `1e-8`
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with approximated proximity penalty
+
+    """
+    distances = (positions[rows] - positions[columns]).pow(2).sum(-1)
+    distances = (distances + epsilon).sqrt()
+    return torch.exp(-distances).sum() / positions.shape[0] ** 2
+
+
+def sampled_proximity(positions, samples: int, epsilon: float = 1e-8):
+    """Unbiased Monte-Carlo estimate of `proximity`.
+
+    `samples` pairs of neurons are drawn uniformly (with replacement), hence
+    cost of the estimate does not depend on layer's width.
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of shape `(N, D)`
+    samples: int
+            How many pairs of neurons are drawn.
+    epsilon: float, optional
+            Small non-zero value in rare case distance is too small to
+            have `sqrt` taken from it. Default: `1e-8`
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with estimated proximity penalty
+
+    """
+    rows, columns = torch.randint(
+        positions.shape[0], (2, samples), device=positions.device
+    )
+    return sparse_proximity(positions, rows, columns, epsilon) * (
+        positions.shape[0] ** 2 / samples
+    )
+
+
+def sampled_transport(
+    positions, previous_positions, weight, norm: str, samples: int
+):
+    """Unbiased Monte-Carlo estimate of transport penalty.
+
+    Transport penalty is the mean of `distance * norm(weight)` over all connections
+    between current layer and previous one. Here `samples` connections are drawn
+    uniformly (with replacement) instead.
+
+    Parameters
+    ----------
+    positions: torch.Tensor
+            Positions of neurons of current layer of shape `(out, D)`
+    previous_positions: torch.Tensor
+            Positions of neurons of previous spatial layer of shape `(in, D)`
+    weight: torch.Tensor
+            Weight of current layer of shape `(out, in)` or `(out, in, *kernel_size)`
+    norm: str
+            Either "l1" or "l2" (case insensitive), representing LP norm to be used.
+    samples: int
+            How many connections are drawn.
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with estimated transport penalty
+
+    """
+    _check_connections(positions, previous_positions, weight)
+    outputs = torch.randint(weight.shape[0], (samples,), device=weight.device)
+    inputs = torch.randint(weight.shape[1], (samples,), device=weight.device)
+    distances = positions[outputs] - previous_positions[inputs]
+    distances = distances.pow(2).sum(-1).sqrt()
+    # Each drawn connection is weighted by its mean normed kernel
+    strength = _norm(_kernels(weight)[outputs, inputs], norm).mean(dim=-1)
+    return (distances * strength).mean()
+
+
+def spatial_cross_entropy(
+    y_pred,
+    y_true,
+    labels: int,
+    proximity_positions: typing.List[torch.Tensor],
+    positions: typing.List[torch.Tensor],
+    previous_positions: typing.List[torch.Tensor],
+    weights: typing.List[torch.Tensor],
+    alpha: float,
+    beta: float,
+    l1: bool,
+    epsilon: float = 1e-8,
+):
+    """Cross entropy with proximity and transport penalties as a single function.
+
+    Works on tensors gathered beforehand (instead of modules) and uses only
+    operations understood by `torch.jit.script` or `torch.compile`, so kernels
+    of the whole loss can be fused. Penalties are calculated exactly
+    (no tiling, neighbours or sampling).
+
+    Parameters
+    ----------
+    y_pred: torch.Tensor
+            Output of neural network
+    y_true: torch.Tensor
+            Targets; `(batch, tasks)` for multiple outputs or `(batch,)` for
+            sequential setting (modified in-place in the latter case).
+    labels: int
+            How many labels are used by each task
+    proximity_positions: List[torch.Tensor]
+            Positions of shape `(N, D)` of each layer constrained by proximity
+    positions: List[torch.Tensor]
+            Positions of shape `(out, D)` of each layer constrained by transport
+    previous_positions: List[torch.Tensor]
+            Positions of shape `(in, D)` of previous spatial layer for each
+            layer constrained by transport
+    weights: List[torch.Tensor]
+            Weights of each layer constrained by transport
+    alpha: float
+            Proximity hyperparameter
+    beta: float
+            Transport hyperparameter
+    l1: bool
+            Whether L1 (`True`) or L2 (`False`) norm of weights is used by transport
+    epsilon: float, optional
+            Small non-zero value in rare case distance is too small to
+            have `sqrt` taken from it. Default: `1e-8`
+
+    Returns
+    -------
+    torch.Tensor
+            0-d tensor with loss value
+
+    """
+    if y_true.dim() > 1:
+        y_pred = y_pred.reshape(y_true.shape[0], -1, y_true.shape[1])
+    else:  # Sequential setting
+        indices = torch.floor_divide(y_true, labels).long()
+        indices = indices.repeat_interleave(labels)
+        y_pred = y_pred.reshape(y_true.shape[0], labels, -1)
+        y_pred = y_pred.gather(2, indices.view(-1, labels, 1)).squeeze()
+        y_true.remainder_(labels)
+
+    loss = torch.nn.functional.cross_entropy(y_pred, y_true)
+
+    proximity_penalty = []
+    for layer_positions in proximity_positions:
+        distances = layer_positions.unsqueeze(0) - layer_positions.unsqueeze(1)
+        distances = (distances.pow(2).sum(-1) + epsilon).sqrt()
+        proximity_penalty.append(torch.exp(-distances).mean())
+    if len(proximity_penalty) > 0:
+        loss = loss + alpha * torch.stack(proximity_penalty).mean()
+
+    transport_penalty = []
+    for layer_positions, layer_previous, weight in zip(
+        positions, previous_positions, weights
+    ):
+        distances = layer_positions.unsqueeze(1) - layer_previous.unsqueeze(0)
+        distances = distances.pow(2).sum(-1).sqrt()
+        kernels = weight.reshape(weight.shape[0], weight.shape[1], -1)
+        if l1:
+            kernels = torch.abs(kernels)
+        else:
+            kernels = torch.pow(kernels, 2)
+        transport_penalty.append((distances.unsqueeze(-1) * kernels).mean())
+    if len(transport_penalty) > 0:
+        loss = loss + beta * torch.stack(transport_penalty).mean()
+
+    return loss
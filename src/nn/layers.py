@@ -12,6 +12,7 @@ underscored layers do not have shape inference capabilities.
 import torch
 
 import torchlayers
+from torchlayers._dev_utils import infer
 
 
 # Check different initialization schemes and how it changes the outcome?
@@ -114,8 +115,36 @@ class _SpatialConv(torchlayers.convolution.Conv):
             bias,
             padding_mode,
         )
+        # Name of inner module is deduced from class name, e.g. torch.nn.Conv2d
+        self._module_name = "Conv"
         self.positions = torch.nn.Parameter(torch.randn(dim, out_channels))
 
+    @property
+    def weight(self):
+        """Weight of inner convolution of shape `(out, in, *kernel_size)`."""
+        return getattr(self, self._inner_module_name).weight
+
+    # torchlayers pickles convolution as its inner `torch.nn.ConvNd`,
+    # which would drop `positions`; whole spatial module is pickled instead
+    def __reduce__(self):
+        return object.__reduce__(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Closures created by torchlayers cannot be pickled, see `__setstate__`
+        del state["_repr"], state["_reduce"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._repr = infer.create_repr(
+            self._inner_module_name,
+            **{key: getattr(self, key) for key in self._noninferable_attributes},
+        )
+        self._reduce = infer.create_reduce(
+            self._inner_module_name, *self._noninferable_attributes
+        )
+
 
 ###############################################################################
 #
@@ -1,10 +1,16 @@
+import collections
 import dataclasses
 import typing
+import weakref
 
 import torch
 
+from . import functional
 from .layers import spatial
 
+# Default number of neurons processed at once by spatial losses (see `--tile`)
+TILE = 1024
+
 
 def get(args, model):
     """Based on user input return either spatial cross entropy or regular one.
@@ -27,10 +33,53 @@ def get(args, model):
 
     """
     if hasattr(args, "where") and args.where is not None:
-        return SpatialCrossEntropyLoss(model, args.proximity, args.transport, args.norm, args.where, args.labels)
+        if args.compile_loss:
+            return CompiledSpatialCrossEntropyLoss(
+                model,
+                args.proximity,
+                args.transport,
+                args.norm,
+                args.where,
+                args.labels,
+                every=args.regularize_every,
+            )
+        return SpatialCrossEntropyLoss(
+            model,
+            args.proximity,
+            args.transport,
+            args.norm,
+            args.where,
+            args.labels,
+            tile=TILE if args.tile is None else args.tile,
+            cutoff=args.cutoff,
+            rebuild=args.rebuild_every,
+            proximity_samples=args.proximity_samples,
+            transport_samples=args.transport_samples,
+            batched=args.batched_penalties,
+            every=args.regularize_every,
+        )
     return CustomCrossEntropyLoss()
 
 
+def _per_layer(where, values):
+    """Map each index from `where` to value (single value is used for every index)."""
+    if values is None:
+        return {}
+    if len(values) == 1:
+        values = values * len(where)
+    if len(values) != len(where):
+        raise ValueError(
+            "Either single value or one value for each spatial layer (--where) "
+            "has to be specified."
+        )
+    return dict(zip(where, values))
+
+
+def _mean(penalties):
+    """Mean of per-layer penalties (values of dictionary)."""
+    return torch.stack(list(penalties.values())).mean()
+
+
 class CustomCrossEntropyLoss:
     """Normal CrossEntropyLoss, but reshapes neural net output appropriately.
 
@@ -63,14 +112,77 @@ class SpatialCrossEntropyLoss:
             Transport hyperparameter
     norm: str
             Either "l1" or "l2" (case insensitive), representing LP norm to be used.
+    tile: int, optional
+            How many neurons are processed at once by proximity and transport penalties.
+            If `None`, all neurons of a layer are processed at once. Default: `None`
+    cutoff: float, optional
+            If specified, proximity penalty is approximated using only pairs
+            of neurons closer than `cutoff`. Default: `None` (exact penalty)
+    rebuild: int, optional
+            Every how many calls pairs of neighbouring neurons are found anew.
+            Used only if `cutoff` is specified. Default: `1`
+    proximity_samples: List[int], optional
+            If specified, proximity penalty is estimated from this many randomly
+            drawn pairs of neurons. Either single value or one per `where` layer.
+            Default: `None` (exact penalty)
+    transport_samples: List[int], optional
+            If specified, transport penalty is estimated from this many randomly
+            drawn connections. Either single value or one per `where` layer.
+            Default: `None` (exact penalty)
+    batched: bool, optional
+            If `True`, exact penalties of all layers are calculated together
+            with a few vectorized operations. Default: `False`
+    every: int, optional
+            Every how many training steps penalties are applied (see `Interval`).
+            Default: `1`
+
+    Attributes
+    ----------
+    breakdown: Dict[str, torch.Tensor]
+            Detached, unscaled penalty of each layer from last call, keyed
+            like `proximity0`, `transport1` (number is the spatial index of layer).
+            Empty if penalties were not applied during last call.
 
     """
 
-    def __init__(self, module, proximity, transport, norm, where, labels):
+    def __init__(
+        self,
+        module,
+        proximity,
+        transport,
+        norm,
+        where,
+        labels,
+        tile=None,
+        cutoff=None,
+        rebuild=1,
+        proximity_samples=None,
+        transport_samples=None,
+        batched=False,
+        every=1,
+    ):
         self.module = module
         self.labels = labels
-        self.proximity = Proximity(proximity, where)
-        self.transport = Transport(transport, norm, where)
+        self.topology = Topology(module)
+        self.interval = Interval(every)
+        self.breakdown: typing.Dict[str, torch.Tensor] = {}
+        self.proximity = Proximity(
+            proximity,
+            where,
+            tile=tile,
+            cutoff=cutoff,
+            rebuild=rebuild,
+            samples=proximity_samples,
+            batched=batched,
+        )
+        self.transport = Transport(
+            transport,
+            norm,
+            where,
+            tile=tile,
+            samples=transport_samples,
+            batched=batched,
+        )
 
     def __call__(self, y_pred, y_true):
         if len(y_true.shape) > 1:
@@ -82,11 +194,197 @@ class SpatialCrossEntropyLoss:
             y_pred = y_pred.gather(2, indices.view(-1, self.labels, 1)).squeeze()
             y_true %= self.labels
 
-        return (
-            torch.nn.functional.cross_entropy(y_pred, y_true)
-            + self.proximity(self.module)
-            + self.transport(self.module)
+        scale = self.interval(self.module.training)
+        if not scale:
+            self.breakdown = {}
+            return torch.nn.functional.cross_entropy(y_pred, y_true)
+
+        connections = self.topology()
+        proximity = self.proximity.breakdown(connections)
+        transport = self.transport.breakdown(connections)
+        self.breakdown = {
+            f"{name}{index}": penalty.detach()
+            for name, penalties in (("proximity", proximity), ("transport", transport))
+            for index, penalty in penalties.items()
+        }
+
+        return torch.nn.functional.cross_entropy(y_pred, y_true) + scale * (
+            self.proximity.alpha * _mean(proximity)
+            + self.transport.beta * _mean(transport)
+        )
+
+
+class CompiledSpatialCrossEntropyLoss:
+    """SpatialCrossEntropyLoss computed by single compiled function.
+
+    Positions and weights of spatial layers are gathered each call and passed
+    to `functional.spatial_cross_entropy`, which is compiled with `torch.compile`
+    (if available) or `torch.jit.script` so kernels of cross entropy, proximity and
+    transport can be fused.
+
+    Penalties are always exact and dense (tiling, cutoff and sampling are not
+    available in this mode).
+
+    Parameters
+    ----------
+    module: torch.nn.Module
+            Module whose weights will be constrained by proximity and transport loss.
+    proximity: float
+            Proximity hyperparameter
+    transport: float
+            Transport hyperparameter
+    norm: str
+            Either "l1" or "l2" (case insensitive), representing LP norm to be used.
+    where: List[int]
+            Indices of spatial layers constrained by penalties.
+    labels: int
+            How many labels are used by each task
+    every: int, optional
+            Every how many training steps penalties are applied (see `Interval`).
+            Default: `1`
+
+    """
+
+    def __init__(self, module, proximity, transport, norm, where, labels, every=1):
+        if norm.lower() not in ("l1", "l2"):
+            raise ValueError("Unsupported weight norm. One of L1/L2 available.")
+        self.module = module
+        self.labels = labels
+        self.alpha = proximity
+        self.beta = transport
+        self.l1 = norm.lower() == "l1"
+        self.where = where
+        self.topology = Topology(module)
+        self.interval = Interval(every)
+
+        compile = getattr(torch, "compile", None)
+        if compile is not None:
+            self._function = compile(functional.spatial_cross_entropy)
+        else:
+            self._function = torch.jit.script(functional.spatial_cross_entropy)
+
+    def __call__(self, y_pred, y_true):
+        scale = self.interval(self.module.training)
+        constrained = [
+            connection
+            for connection in self.topology()
+            if connection.index in self.where and scale
+        ]
+        connected = [
+            connection for connection in constrained if connection.previous is not None
+        ]
+        return self._function(
+            y_pred,
+            y_true,
+            self.labels,
+            [connection.layer.positions.T for connection in constrained],
+            [connection.layer.positions.T for connection in connected],
+            [connection.previous.positions.T for connection in connected],
+            [connection.layer.weight for connection in connected],
+            scale * self.alpha,
+            scale * self.beta,
+            self.l1,
+        )
+
+
+@dataclasses.dataclass
+class Interval:
+    """Decide whether (and how strongly) penalties are applied during current step.
+
+    During training penalties are applied every `every` steps (starting with
+    the first one) and scaled by `every`, so on average regularizers
+    contribute the same as if they were applied each step
+    (similarly to gradient accumulation). Returns `0` for steps without penalties.
+
+    Evaluation steps (module not in `training` mode) always apply unscaled
+    penalties and are not counted.
+
+    Parameters
+    ----------
+    every: int, optional
+            Every how many training steps penalties are applied. Default: `1`
+
+    """
+
+    every: int = 1
+
+    def __post_init__(self):
+        if self.every < 1:
+            raise ValueError("Penalties have to be applied every one or more steps.")
+        self._steps: int = 0
+
+    def __call__(self, training: bool) -> int:
+        if not training:
+            return 1
+        self._steps += 1
+        return self.every if (self._steps - 1) % self.every == 0 else 0
+
+
+"""
+Spatial layer constrained by regularizers.
+
+`previous` is the closest spatial layer preceding `layer` (or `None`)
+and `index` is position of `layer` among all spatial layers (as in `--where`).
+
+"""
+Connection = collections.namedtuple("Connection", ["layer", "previous", "index"])
+
+
+class Topology:
+    """Ordered spatial layers of a module, computed once and cached.
+
+    Walking `module.modules()` on every loss evaluation is costly for small batches
+    and deep networks. Instead, list of `Connection` tuples is created on first call
+    (after shape inference, as inferrable layers are created lazily) and reused.
+
+    Cached list is invalidated whenever new submodule is registered anywhere
+    (if PyTorch provides global module registration hook) or via `invalidate`.
+
+    Parameters
+    ----------
+    module: torch.nn.Module
+            Module whose spatial layers will be gathered.
+
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.invalidate()
+
+        register = getattr(
+            torch.nn.modules.module, "register_module_module_registration_hook", None
         )
+        self._handle = None
+        if register is not None:
+            # Weak reference so global hook does not keep this object alive
+            reference = weakref.ref(self)
+
+            def hook(*_):
+                topology = reference()
+                if topology is not None:
+                    topology.invalidate()
+
+            self._handle = register(hook)
+
+    def __del__(self):
+        if getattr(self, "_handle", None) is not None:
+            self._handle.remove()
+
+    def __call__(self) -> typing.List[Connection]:
+        if self._connections is None:
+            self._connections = []
+            previous = None
+            for submodule in self.module.modules():
+                if spatial(submodule):
+                    self._connections.append(
+                        Connection(submodule, previous, len(self._connections))
+                    )
+                    previous = submodule
+        return self._connections
+
+    def invalidate(self) -> None:
+        """Force recalculation of spatial layers during next call."""
+        self._connections: typing.List[Connection] = None
 
 
 @dataclasses.dataclass
@@ -104,6 +402,27 @@ class Proximity:
     epsilon: float, optional
             Small non-zero value in rare case distance is too small to
             have `sqrt` taken from it.
+    tile: int, optional
+            How many neurons are processed at once. Distances are computed
+            in `(tile, N)` blocks, so memory grows linearly with layer's width.
+            If `None`, all neurons are processed at once. Default: `None`
+    cutoff: float, optional
+            If specified, only pairs of neurons closer than `cutoff` are
+            taken into account (see `functional.neighbours`). As `exp(-distance)`
+            decays fast, distant pairs contribute almost nothing to the penalty.
+            Default: `None` (exact penalty)
+    rebuild: int, optional
+            Every how many calls pairs of neighbouring neurons are found anew.
+            In-between, pairs found previously are used with current positions.
+            Used only if `cutoff` is specified. Default: `1`
+    samples: List[int], optional
+            If specified, penalty of each layer is estimated from this many
+            randomly drawn pairs of neurons (unbiased Monte-Carlo estimate).
+            Either single value or one per `where` layer. Takes precedence
+            over `cutoff`. Default: `None` (exact penalty)
+    batched: bool, optional
+            If `True`, exact penalties of all layers are calculated together
+            (see `functional.batched_proximity`). Default: `False`
     spatial_types: Tuple[type]
             Tuple containing types to be considered spatial.
             Default: (SpatialLinear, SpatialConv)
@@ -113,25 +432,66 @@ class Proximity:
     alpha: float
     where: typing.List[int]
     epsilon: float = 1e-8
+    tile: int = None
+    cutoff: float = None
+    rebuild: int = 1
+    samples: typing.List[int] = None
+    batched: bool = False
 
-    def __call__(self, module):
-        proximity_penalty = []
-
-        spatial_idx = 0
-        for submodule in module.modules():
-            if spatial(submodule):
-                if spatial_idx in self.where:
-                    positions = submodule.positions.T
-                    # Get a 2-d array of vectors => [N, N, 2]
-                    distances = positions.unsqueeze(0) - positions.unsqueeze(1)
-                    # Calculate squared distances and flatten => [N, N]
-                    distances = distances.pow(2).sum(-1).view(-1)
-                    # Take a square root after making sure that there are no zeros
-                    distances = (distances + self.epsilon).sqrt()
-                    proximity_penalty.append(torch.exp(-distances).mean())
-                spatial_idx += 1
+    def __post_init__(self):
+        self._calls: int = 0
+        self._neighbours: typing.Dict = {}
+        self._samples: typing.Dict[int, int] = _per_layer(self.where, self.samples)
+
+    def _penalty(self, positions, spatial_idx):
+        if spatial_idx in self._samples:
+            return functional.sampled_proximity(
+                positions, self._samples[spatial_idx], self.epsilon
+            )
+        if self.cutoff is None:
+            return functional.proximity(positions, self.epsilon, self.tile)
+        if self._calls % self.rebuild == 0 or spatial_idx not in self._neighbours:
+            self._neighbours[spatial_idx] = functional.neighbours(
+                positions, self.cutoff
+            )
+        return functional.sparse_proximity(
+            positions, *self._neighbours[spatial_idx], self.epsilon
+        )
 
-        return self.alpha * torch.stack(proximity_penalty).mean()
+    def breakdown(self, connections) -> typing.Dict[int, torch.Tensor]:
+        """Unscaled penalty of each constrained layer keyed by its spatial index."""
+        constrained = [
+            connection for connection in connections if connection.index in self.where
+        ]
+        penalties = {}
+        exact = [
+            connection
+            for connection in constrained
+            if connection.index not in self._samples and self.cutoff is None
+        ]
+        if self.batched and exact:
+            penalties.update(
+                zip(
+                    (connection.index for connection in exact),
+                    functional.batched_proximity(
+                        [connection.layer.positions.T for connection in exact],
+                        self.epsilon,
+                        self.tile,
+                    ),
+                )
+            )
+        for connection in constrained:
+            if connection.index not in penalties:
+                penalties[connection.index] = self._penalty(
+                    connection.layer.positions.T, connection.index
+                )
+        self._calls += 1
+        return {
+            connection.index: penalties[connection.index] for connection in constrained
+        }
+
+    def __call__(self, connections):
+        return self.alpha * _mean(self.breakdown(connections))
 
 
 @dataclasses.dataclass
@@ -150,6 +510,18 @@ class Transport:
     norm: str
             Norm to be used for distance calculation. Either "l1" or "l2" case
             insensitive allowed.
+    tile: int, optional
+            How many output neurons are processed at once. Distances are computed
+            in `(tile, in)` blocks and are not kept for backward pass.
+            If `None`, all neurons are processed at once. Default: `None`
+    samples: List[int], optional
+            If specified, penalty of each layer is estimated from this many
+            randomly drawn connections (unbiased Monte-Carlo estimate).
+            Either single value or one per `where` layer.
+            Default: `None` (exact penalty)
+    batched: bool, optional
+            If `True`, exact penalties of all layers are calculated together
+            (see `functional.batched_transport`). Default: `False`
     spatial_types: Tuple[type], optional
             Tuple containing types to be considered spatial.
             Default: (SpatialLinear, SpatialConv)
@@ -159,42 +531,62 @@ class Transport:
     beta: float
     norm: str
     where: typing.List[int]
+    tile: int = None
+    samples: typing.List[int] = None
+    batched: bool = False
 
     def __post_init__(self):
-        if self.norm.lower() == "l1":
-            self._norm_function = lambda weight: torch.abs(weight)
-        elif self.norm.lower() == "l2":
-            self._norm_function = lambda weight: torch.pow(weight, 2)
-        else:
+        self._samples: typing.Dict[int, int] = _per_layer(self.where, self.samples)
+        if self.norm.lower() not in ("l1", "l2"):
             raise ValueError("Unsupported weight norm. One of L1/L2 available.")
 
-    def _find_previous_spatial(self, submodules):
-        for module in reversed(submodules):
-            if spatial(module):
-                return module
-        return None
-
-    def __call__(self, module):
-        transport_penalty = []
-        submodules = list(module.modules())
-        spatial_idx = 0
-        for i, submodule in enumerate(submodules):
-            if spatial(submodule):
-                previous_spatial = self._find_previous_spatial(submodules[:i])
-                if previous_spatial is not None and spatial_idx in self.where:
-                    distances = (
-                        # Weights are of shape (2, out) for easier generalization
-                        # With convolution
-                        submodule.positions.T.unsqueeze(1)
-                        - previous_spatial.positions.T.unsqueeze(0)
-                        # + 1
-                    )
-                    distances = distances.pow(2).sum(-1).sqrt()
-                    normalized_weights = self._norm_function(submodule.weight)
-
-                    transport_penalty.append(
-                        (distances * normalized_weights).mean()
-                    )
-                spatial_idx += 1
-
-        return self.beta * torch.stack(transport_penalty).mean()
+    def _penalty(self, connection):
+        # Positions are of shape (2, out) for easier generalization
+        # With convolution
+        arguments = (
+            connection.layer.positions.T,
+            connection.previous.positions.T,
+            connection.layer.weight,
+            self.norm,
+        )
+        if connection.index in self._samples:
+            return functional.sampled_transport(
+                *arguments, self._samples[connection.index]
+            )
+        return functional.transport(*arguments, self.tile)
+
+    def breakdown(self, connections) -> typing.Dict[int, torch.Tensor]:
+        """Unscaled penalty of each constrained layer keyed by its spatial index."""
+        constrained = [
+            connection
+            for connection in connections
+            if connection.previous is not None and connection.index in self.where
+        ]
+        penalties = {}
+        exact = [
+            connection
+            for connection in constrained
+            if connection.index not in self._samples
+        ]
+        if self.batched and exact:
+            penalties.update(
+                zip(
+                    (connection.index for connection in exact),
+                    functional.batched_transport(
+                        [connection.layer.positions.T for connection in exact],
+                        [connection.previous.positions.T for connection in exact],
+                        [connection.layer.weight for connection in exact],
+                        self.norm,
+                        self.tile,
+                    ),
+                )
+            )
+        for connection in constrained:
+            if connection.index not in penalties:
+                penalties[connection.index] = self._penalty(connection)
+        return {
+            connection.index: penalties[connection.index] for connection in constrained
+        }
+
+    def __call__(self, connections):
+        return self.beta * _mean(self.breakdown(connections))
@@ -8,13 +8,15 @@ If you want to perform additional measures of performance, please place them her
 
 import abc
 
-def get(writer, dataset, stage, tasks, input_type):
+def get(writer, dataset, stage, tasks, input_type, criterion=None):
     """Based on user input return metrics attached to the network.
 
     Following metrics will be returned:
     - Accuracy (overall, no matter the task)
     - Loss
     - Per task accuracies (useful for `score` subparser command)
+    - Per layer proximity and transport penalties (if `criterion` provides
+      `breakdown`, see `nn.loss.SpatialCrossEntropyLoss`)
 
     All of them will log their data within Tensorboard as well.
 
@@ -33,6 +35,9 @@ def get(writer, dataset, stage, tasks, input_type):
             How many tasks were specified by the user.
     input_type: str
             Type of the input as string
+    criterion: typing.Callable, optional
+            Loss function used in passes. If it has `breakdown` attribute,
+            per layer penalties will be logged as well. Default: `None`
 
     Returns
     -------
@@ -65,6 +70,11 @@ def get(writer, dataset, stage, tasks, input_type):
             )
             for index in range(tasks)
         },
+        **(
+            {"penalties": Penalties(writer, stage=stage, criterion=criterion)}
+            if hasattr(criterion, "breakdown")
+            else {}
+        ),
     )
 
 
@@ -189,6 +199,56 @@ class PerTaskAccuracy(TensorboardMean):
         self.score += (y_pred.argmax(dim=1) == y_true).float().sum()
 
 
+class Penalties:
+    """Calculate mean per layer penalties of spatial loss.
+
+    Values are read from `criterion.breakdown` after each pass and
+    logged into Tensorboard under `Proximity{index}/{stage}` and
+    `Transport{index}/{stage}` names.
+
+    Parameters
+    ----------
+    writer : torch.utils.tensorboard.SummaryWriter
+            Writer responsible for logging values.
+    stage: str
+            Under which stage results will be logged. Case insensitive,
+            will be automatically capitalized.
+    criterion: nn.loss.SpatialCrossEntropyLoss
+            Loss providing `breakdown` dictionary of its last call.
+
+    """
+
+    def __init__(self, writer, stage: str, criterion):
+        self.writer = writer
+        self.stage: str = stage.capitalize()
+        self.criterion = criterion
+
+        self.scores = {}
+        self.passes: int = 0
+        self.step: int = 0
+
+    def __call__(self, output):
+        # Empty if penalties were skipped during this pass
+        if self.criterion.breakdown:
+            for name, penalty in self.criterion.breakdown.items():
+                self.scores[name] = self.scores.get(name, 0) + penalty.item()
+            self.passes += 1
+
+    def get(self):
+        """Retrieve mean of per layer penalties after keeping them within metric."""
+        results = {
+            name: score / max(self.passes, 1) for name, score in self.scores.items()
+        }
+        for name, result in results.items():
+            self.writer.add_scalar(
+                f"{name.capitalize()}/{self.stage}", result, self.step
+            )
+        self.step += 1
+        self.scores = {}
+        self.passes = 0
+        return results
+
+
 class Gather:
     """Gather all metrics and run/get them all with single call.
 
@@ -84,8 +84,7 @@ class Base(torch.nn.Module):
             modules += [self.spatial_type(width), activation]
         self.layers = torch.nn.Sequential(*modules)
 
-        bottleneck_type = self.spatial_type
-        self.bottleneck = self.create_bottleneck(labels, tasks, bottleneck_type)
+        self.bottleneck = self.create_bottleneck(labels, tasks, self.bottleneck_type)
 
     def forward(self, inputs):
         return self.bottleneck(self.layers(self.modify_inputs(inputs)))
@@ -125,6 +124,14 @@ class Base(torch.nn.Module):
         """
         pass
 
+    @property
+    def bottleneck_type(self):
+        """Class of final (classifying) layer passed to `create_bottleneck`.
+
+        By default the same as `spatial_type`.
+        """
+        return self.spatial_type
+
     @property
     @abc.abstractmethod
     def spatial_type(self):
@@ -2,7 +2,7 @@ import torch
 
 import torchlayers
 
-from ..layers import SpatialConv
+from ..layers import SpatialConv, SpatialLinear
 from ._base import Base
 
 
@@ -15,13 +15,18 @@ class Conv(Base):
     def regular_type(self):
         return torchlayers.Conv2d
 
+    # Output of global pooling is of shape (batch, channels)
+    @property
+    def bottleneck_type(self):
+        return SpatialLinear
+
 
 class SingleOutput(Conv):
     """Convolution network with single output (for sequential input)."""
 
     def create_bottleneck(self, labels, _, linear_cls):
         return torch.nn.Sequential(
-            torchlayers.GlobalMaxPool(), linear_cls(labels)
+            torch.nn.AdaptiveMaxPool2d(1), torch.nn.Flatten(), linear_cls(labels)
         )
 
 
@@ -30,5 +35,7 @@ class MultipleOutputs(Conv):
 
     def create_bottleneck(self, labels, tasks, linear_cls):
         return torch.nn.Sequential(
-            torchlayers.GlobalMaxPool(), linear_cls(labels * tasks)
+            torch.nn.AdaptiveMaxPool2d(1),
+            torch.nn.Flatten(),
+            linear_cls(labels * tasks),
         )
@@ -90,3 +90,90 @@ class Validation:
         predicted = self.module(image)
         loss = self.criterion(predicted, label)
         return (loss, predicted, label)
+
+
+# Single pass through data sample for multiple models
+@dataclasses.dataclass
+class MultiValidation:
+    """Perform validation of multiple models on the same sample.
+
+    On GPU, models with identical architecture (e.g. separately saved per-task
+    models) have their parameters stacked via `torch.func.stack_module_state`
+    and are run at once with `torch.func.vmap`. Otherwise (CPU, where batched
+    kernels bring no gain, different architectures, views sharing parameters
+    of single split model or older PyTorch) models are run one after another;
+    sample is still loaded only once.
+
+    All modules will be put in `eval` mode.
+
+    Parameters
+    ----------
+    modules: List[torch.nn.Module]
+            Modules to be validated.
+    criterion: typing.Callable
+            Criterion (e.g. `torch.nn.CrossEntropy`)
+    cuda: bool
+            Whether to use cuda for validation.
+
+    Returns
+    -------
+    List[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]]
+            `(loss, predicted, label)` for each module (like `Validation`).
+
+    """
+
+    modules: typing.List[torch.nn.Module]
+    criterion: typing.Callable
+    cuda: bool
+
+    def __post_init__(self):
+        if self.cuda:
+            self.modules = [module.cuda() for module in self.modules]
+        for module in self.modules:
+            module.eval()
+        self._forward = self._stack()
+
+    def _stack(self):
+        functional = getattr(torch, "func", None)
+        if functional is None or not self.cuda or self._shared():
+            return None
+        try:
+            params, buffers = functional.stack_module_state(self.modules)
+        except Exception:
+            return None
+        # Stacked tensors are swapped into the first module during each call
+        base = self.modules[0]
+        forward = functional.vmap(
+            lambda params, buffers, image: functional.functional_call(
+                base, (params, buffers), (image,)
+            ),
+            in_dims=(0, 0, None),
+        )
+        return lambda image: forward(params, buffers, image)
+
+    def _shared(self) -> bool:
+        """Whether modules share parameters (e.g. views of single split model)."""
+        pointers = [
+            parameter.data_ptr()
+            for module in self.modules
+            for parameter in module.parameters()
+        ]
+        return len(set(pointers)) != len(pointers)
+
+    def __call__(self, sample, *_):
+        image, label = sample
+        if self.cuda:
+            image = image.cuda()
+            label = label.cuda()
+        with torch.no_grad():
+            if self._forward is not None:
+                predictions = self._forward(image)
+            else:
+                predictions = [module(image) for module in self.modules]
+        results = []
+        for predicted in predictions:
+            # Criterion and metrics may modify labels in-place
+            module_label = label.clone()
+            loss = self.criterion(predicted, module_label)
+            results.append((loss, predicted, module_label))
+        return results
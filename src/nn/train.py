@@ -1,4 +1,6 @@
 import dataclasses
+import queue
+import threading
 import typing
 
 import torch
@@ -12,20 +14,121 @@ class Loop:
     through: typing.Callable
     dataloader: torch.utils.data.DataLoader
     length: int
+    # How many samples are loaded ahead by background thread (0 disables it)
+    prefetch: int = 0
+    cuda: bool = False
 
     def __call__(self):
-        for sample in tqdm.tqdm(self.dataloader, total=self.length):
+        samples = self.dataloader
+        if self.prefetch > 0:
+            samples = Prefetcher(samples, self.prefetch, self.cuda)
+        for sample in tqdm.tqdm(samples, total=self.length):
             yield self.through(sample)
 
 
-def get_loop(single_pass, dataset, hyperparams):
+class Prefetcher:
+    """Load samples from iterable in background thread.
+
+    Up to `depth` samples are kept ready, so loading (and collation) of
+    next samples overlaps with computation on current one.
+    If `cuda`, tensors are pinned and copied to GPU by the thread on
+    separate CUDA stream; consumer waits only for the sample it takes.
+
+    Parameters
+    ----------
+    iterable: Iterable
+            Source of samples, usually `torch.utils.data.DataLoader`.
+    depth: int
+            How many samples can be loaded ahead.
+    cuda: bool
+            Whether samples should be moved to GPU.
+
+    """
+
+    _END = object()
+
+    def __init__(self, iterable, depth: int, cuda: bool):
+        self.iterable = iterable
+        self.depth: int = depth
+        self.cuda: bool = cuda and torch.cuda.is_available()
+
+    def __iter__(self):
+        samples = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._stage, args=(samples, stop), daemon=True
+        )
+        thread.start()
+        try:
+            while True:
+                item = samples.get()
+                if item is Prefetcher._END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                sample, event = item
+                if event is not None:
+                    stream = torch.cuda.current_stream()
+                    stream.wait_event(event)
+                    _apply(sample, lambda tensor: tensor.record_stream(stream))
+                yield sample
+        finally:
+            stop.set()
+            # Unblock thread waiting for free slot
+            while thread.is_alive():
+                try:
+                    samples.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.01)
+
+    def _stage(self, samples, stop) -> None:
+        stream = torch.cuda.Stream() if self.cuda else None
+        try:
+            for sample in self.iterable:
+                event = None
+                if stream is not None:
+                    with torch.cuda.stream(stream):
+                        sample = _apply(sample, _to_cuda)
+                        event = torch.cuda.Event()
+                        event.record(stream)
+                samples.put((sample, event))
+                if stop.is_set():
+                    return
+            samples.put(Prefetcher._END)
+        except Exception as error:
+            samples.put(error)
+
+
+def _apply(sample, function):
+    """Apply `function` to every tensor in (possibly nested) tuple or list."""
+    if isinstance(sample, torch.Tensor):
+        return function(sample)
+    if isinstance(sample, (tuple, list)):
+        return type(sample)(_apply(element, function) for element in sample)
+    return sample
+
+
+def _to_cuda(tensor):
+    if not tensor.is_pinned():
+        tensor = tensor.pin_memory()
+    return tensor.cuda(non_blocking=True)
+
+
+def get_loop(single_pass, dataset, hyperparams, workers: int = 0, prefetch: int = 0):
+    batch_size = hyperparams["batch"]
+    # Dataset able to yield ready-made batches (e.g. data.datasets.Sequential)
+    if hasattr(dataset, "batch_size"):
+        dataset.batch_size, batch_size = batch_size, None
     return Loop(
         single_pass,
         torch.utils.data.DataLoader(
             dataset,
             shuffle=False,
-            batch_size=hyperparams["batch"],
+            batch_size=batch_size,
             pin_memory=single_pass.cuda,
+            num_workers=workers,
         ),
         len(dataset) // hyperparams["batch"],
+        prefetch=prefetch,
+        cuda=single_pass.cuda,
     )
@@ -1,9 +1,14 @@
 import torchvision
 
+import data
+
 
 def get_datasets(args, train: bool):
     """Return user specified `torchvision` datasets.
 
+    Unless `--no-cache` is specified, datasets are decoded once into tensors
+    kept under `--root` (see `data.cache`) and reused by every subcommand.
+
     Please note those need to have the same signature;
     If you were to change that, you should manipulate this function accordingly
     (or make it into new module).
@@ -20,6 +25,8 @@ def get_datasets(args, train: bool):
     List[torch.utils.data.Dataset]
 
     """
+    if args.cache:
+        return [data.cache.get(args.root, name, train) for name in args.datasets]
     return [
         getattr(torchvision.datasets, name)(
             args.root,
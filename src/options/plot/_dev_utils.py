@@ -2,10 +2,25 @@ import pathlib
 
 import torch
 
+from ..record import recorders
+from ..split import activations
+
+
+def _numbered(paths):
+    """Sort paths named by consecutive integers (e.g. `2.pt` before `10.pt`)."""
+    return sorted(paths, key=lambda path: int(path.stem))
+
+
+def _load(path, quantiles: bool):
+    """Load recorded layer as single value per neuron, just like `split` does."""
+    return activations.per_neuron(torch.load(path).cpu(), quantiles)
+
 
 def get_data(data):
-    for task in pathlib.Path(data).glob("*"):
-        yield [torch.load(layer).cpu() for layer in sorted(list(task.glob("*")))]
+    quantiles = recorders.metadata(data)["quantiles"] is not None
+    tasks = (path for path in pathlib.Path(data).iterdir() if path.is_dir())
+    for task in _numbered(tasks):
+        yield [_load(layer, quantiles) for layer in _numbered(task.glob("*.pt"))]
 
 
 def divide_by_layer(data):
@@ -19,11 +34,13 @@ def divide_by_layer(data):
 def get_task_specific_activations(data):
     tasks = [[] for _ in range(data[0].shape[0])]
     for layer in data:
-        for index, task in enumerate(layer):
-            current_task = layer[index]
-            rest_slice = torch.full((layer.shape[0],), True).bool()
-            rest_slice[index] = False
-            # Maximum activation of other tasks
-            rest, _ = torch.max(layer[rest_slice], dim=0)
-            tasks[index].append(torch.clamp(current_task - rest, min=0))
+        # Maximum activation of other tasks is either the largest or
+        # (for the task being the largest) the second largest one
+        top, indices = torch.topk(layer, k=2, dim=0)
+        largest = torch.arange(layer.shape[0]).view(
+            -1, *[1] * (layer.dim() - 1)
+        ) == indices[0].unsqueeze(0)
+        rest = torch.where(largest, top[1].unsqueeze(0), top[0].unsqueeze(0))
+        for index, current_task in enumerate(torch.clamp(layer - rest, min=0)):
+            tasks[index].append(current_task)
     return tasks
@@ -1,66 +1,97 @@
-import builtins
+import concurrent.futures
 import dataclasses
 import pathlib
 import typing
 
-import matplotlib.pyplot as plt
 import numpy as np
-import torch
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 
 @dataclasses.dataclass(init=True)
 class DenseActivations:
+    """Draw values of neurons of each layer as a single raster image.
+
+    Every layer is a column (row if `horizontal`) of pixels, shorter layers
+    are centered. If layer has more neurons than `resolution`, neighbouring
+    neurons are binned into one pixel (mean of their values), so drawing
+    cost does not depend on number of neurons.
+
+    """
+
     ax: typing.Any
     colormap: typing.Any = None
     horizontal: bool = False
     value_max: int = None
     value_min: int = None
-    neuron_size: int = None
-    edge_colors: typing.Any = None
+    resolution: int = 2048
     orientation: str = "vertical"
 
     def __post_init__(self):
         self.ax.axis("off")
 
-    def __call__(self, *layers: torch.Tensor) -> None:
-        def _find_extremes(layers, initial_value, function: str):
-            return (
-                getattr(builtins, function)(map(getattr(torch, function), layers))
-                if initial_value is None
-                else initial_value
-            )
-
-        vmin, vmax = (
-            _find_extremes(layers, self.value_min, "min"),
-            _find_extremes(layers, self.value_max, "max"),
+    def __call__(self, *layers: np.ndarray) -> None:
+        layers = [np.asarray(layer, dtype=np.float32) for layer in layers]
+        for layer in layers:
+            if layer.ndim != 1:
+                raise ValueError(
+                    f"Layer values of shape {layer.shape} cannot be plotted, "
+                    "single value per neuron of shape (neurons,) is required."
+                )
+        vmin = (
+            min(layer.min() for layer in layers)
+            if self.value_min is None
+            else self.value_min
+        )
+        vmax = (
+            max(layer.max() for layer in layers)
+            if self.value_max is None
+            else self.value_max
         )
         longest_layer = max(map(len, layers))
+        pixels = min(longest_layer, self.resolution)
 
-        last_scatter = None
+        # Empty (NaN) pixels are left transparent
+        image = np.full((pixels, len(layers)), np.nan, dtype=np.float32)
         for index, layer in enumerate(layers):
             spacing = int((longest_layer - len(layer)) * 0.5)
-            layer_position_in_model = np.full(len(layer), index)
-            neuron_positions = range(spacing, spacing + len(layer))
-            last_scatter = self.ax.scatter(
-                x=neuron_positions if self.horizontal else layer_position_in_model,
-                y=layer_position_in_model if self.horizontal else neuron_positions,
-                c=layer.float().numpy(),
-                cmap=self.colormap,
-                s=self.neuron_size,
-                vmin=vmin,
-                vmax=vmax,
-                edgecolors=self.edge_colors,
-            )
+            neuron_positions = np.arange(spacing, spacing + len(layer))
+            bins = neuron_positions * pixels // longest_layer
+            counts = np.bincount(bins, minlength=pixels)
+            summed = np.bincount(bins, weights=layer, minlength=pixels)
+            filled = counts > 0
+            image[filled, index] = summed[filled] / counts[filled]
+
+        image = self.ax.imshow(
+            image.T if self.horizontal else image,
+            cmap=self.colormap,
+            vmin=vmin,
+            vmax=vmax,
+            aspect="auto",
+            interpolation="nearest",
+            origin="lower",
+        )
+        self.ax.figure.colorbar(image, ax=self.ax, orientation=self.orientation)
+
 
-        plt.colorbar(last_scatter, ax=self.ax, orientation=self.orientation)
+def render(layers: typing.List[np.ndarray], path) -> None:
+    """Render activations of single task into `path` (Agg, no display needed)."""
+    figure = Figure(figsize=(12, 12))
+    FigureCanvasAgg(figure)
+    plotter = DenseActivations(ax=figure.gca())
+    plotter(*layers)
+    figure.savefig(path)
 
 
 def plot(data, args):
     folder = pathlib.Path(args.save)
     folder.mkdir(parents=True, exist_ok=True)
-    for index, task in enumerate(data):
-        fig = plt.figure(figsize=(12, 12))
-        ax = fig.gca()
-        plotter = DenseActivations(ax=ax)
-        plotter(*task)
-        fig.savefig(folder / f"task_{index}.png")
+    layers = [[layer.float().numpy() for layer in task] for task in data]
+    paths = [folder / f"task_{index}.png" for index in range(len(data))]
+    if args.workers == 0:
+        for task, path in zip(layers, paths):
+            render(task, path)
+    else:
+        # Each task figure is rendered by separate process
+        with concurrent.futures.ProcessPoolExecutor(args.workers) as executor:
+            list(executor.map(render, layers, paths))
@@ -0,0 +1,165 @@
+"""
+Plot learned `positions` of neurons of every spatial layer.
+
+Neurons are not drawn as separate markers; positions of each layer are
+binned into a 2D grid (density binning) whose resolution grows with number
+of neurons (level of detail), so small layers look like points while
+layers with tens of thousands of neurons cost the same as a single image.
+
+Every bin is colored either by task its neurons are assigned to
+(majority, shaded by density) or by mean recorded activation.
+All layers are drawn as a grid of one figure saved at once.
+
+"""
+
+import math
+import pathlib
+import typing
+
+import matplotlib
+import numpy as np
+import torch
+from matplotlib import cm, colors
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
+
+import nn
+
+from ..record import recorders
+from ..split import _dev_utils as split_utils
+from ..split import activations
+from ..split.backward import greedy
+
+
+def get_positions(model) -> typing.List[np.ndarray]:
+    """Positions of neurons of each spatial layer as `(neurons, 2)` arrays.
+
+    Only first two dimensions are used; one dimensional positions
+    are drawn along horizontal axis.
+
+    """
+    layers = []
+    for module in model.modules():
+        if nn.layers.spatial(module):
+            positions = module.positions.detach().cpu().float().numpy().T
+            if positions.shape[1] == 1:
+                positions = np.concatenate((positions, np.zeros_like(positions)), 1)
+            layers.append(positions[:, :2])
+    return layers
+
+
+def get_tasks(args, model) -> typing.List[np.ndarray]:
+    """Task assigned to each neuron of every spatial layer (as greedy `split` does)."""
+    tasks = split_utils.get_tasks(args, model)
+    masks = split_utils.get_masks(model, tasks, greedy.Masker(args.labels))
+    return [mask.numpy() for mask in masks]
+
+
+def get_activations(args, model) -> typing.List[np.ndarray]:
+    """Largest (over tasks) recorded activation of neurons of each spatial layer.
+
+    Neurons of output layer are not recorded, hence have no values (`NaN`).
+
+    """
+    folders = activations.get_tasks(args.data)
+    quantiles = recorders.metadata(args.data)["quantiles"] is not None
+    spatial = [module for module in model.modules() if nn.layers.spatial(module)]
+    values = []
+    for index, module in enumerate(spatial[:-1]):
+        count = module.weight.shape[0]
+        layer = None
+        # One task at a time, like split does
+        for folder in folders:
+            task = activations.neurons(
+                folder / f"{index + 1}.pt", count, quantiles=quantiles
+            )
+            layer = task if layer is None else torch.max(layer, task)
+        values.append(layer.numpy())
+    return values + [np.full(spatial[-1].weight.shape[0], np.nan)]
+
+
+def _bins(neurons: int, resolution: int) -> int:
+    """Grid size (per axis) giving roughly few neurons per occupied bin."""
+    return int(np.clip(2 * math.sqrt(neurons), 8, resolution))
+
+
+def _grid(positions, bins: int):
+    """Flat bin index of each neuron and extent of the grid."""
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    scale = np.where(high > low, high - low, 1.0)
+    cells = ((positions - low) / scale * bins).astype(np.int64).clip(0, bins - 1)
+    extent = (low[0], low[0] + scale[0], low[1], low[1] + scale[1])
+    return cells[:, 1] * bins + cells[:, 0], extent
+
+
+def task_image(positions, tasks, palette, resolution: int):
+    """RGBA image with color of majority task in every bin, alpha by density."""
+    bins = _bins(len(positions), resolution)
+    flat, extent = _grid(positions, bins)
+    task_count = len(palette)
+    counts = np.bincount(flat * task_count + tasks, minlength=bins * bins * task_count)
+    counts = counts.reshape(bins * bins, task_count)
+    density = counts.sum(axis=-1)
+    image = palette[counts.argmax(axis=-1)]
+    image[:, 3] = np.where(density > 0, 0.3 + 0.7 * density / density.max(), 0)
+    return image.reshape(bins, bins, 4), extent
+
+
+def value_image(positions, values, resolution: int):
+    """Image with mean value of neurons in every bin (`NaN` if empty)."""
+    bins = _bins(len(positions), resolution)
+    flat, extent = _grid(positions, bins)
+    counts = np.bincount(flat, minlength=bins * bins)
+    summed = np.bincount(flat, weights=values, minlength=bins * bins)
+    image = np.full(bins * bins, np.nan)
+    np.divide(summed, counts, out=image, where=counts > 0)
+    return image.reshape(bins, bins), extent
+
+
+def plot(args):
+    """Save grid of position maps of all spatial layers of `args.model`."""
+    model = split_utils.get_model(args)
+    layers = get_positions(model)
+    columns = math.ceil(math.sqrt(len(layers)))
+    rows = math.ceil(len(layers) / columns)
+    figure = Figure(figsize=(5 * columns, 5 * rows))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(rows, columns, squeeze=False).flatten()
+    for ax in axes[len(layers) :]:
+        ax.axis("off")
+
+    if args.color == "task":
+        tasks = get_tasks(args, model)
+        task_count = split_utils.get_tasks(args, model)
+        palette = matplotlib.colormaps["tab20" if task_count > 10 else "tab10"](
+            np.arange(task_count) % 20
+        )
+        for ax, positions, layer_tasks in zip(axes, layers, tasks):
+            image, extent = task_image(positions, layer_tasks, palette, args.resolution)
+            ax.imshow(image, extent=extent, origin="lower", interpolation="nearest")
+        figure.legend(
+            handles=[
+                Patch(color=palette[task], label=f"Task {task}")
+                for task in range(task_count)
+            ],
+            loc="lower center",
+            ncol=min(task_count, 10),
+        )
+    else:
+        values = get_activations(args, model)
+        recorded = np.concatenate(values[:-1])
+        norm = colors.Normalize(recorded.min(), recorded.max())
+        for ax, positions, layer_values in zip(axes, layers, values):
+            image, extent = value_image(positions, layer_values, args.resolution)
+            ax.imshow(
+                image, extent=extent, origin="lower", interpolation="nearest", norm=norm
+            )
+        figure.colorbar(cm.ScalarMappable(norm=norm), ax=list(axes))
+
+    for index, (ax, positions) in enumerate(zip(axes, layers)):
+        ax.set_title(f"Layer {index} ({len(positions)} neurons)")
+
+    folder = pathlib.Path(args.save)
+    folder.mkdir(parents=True, exist_ok=True)
+    figure.savefig(folder / "positions.png")
@@ -10,18 +10,20 @@ from . import _dev_utils, finalize, recorders, reduction
 def run(args):
     if args.input.lower() == "sequential":
         datasets = get_datasets(args, args.train)
-        print(f"Datasets used: {[type(dataset).__name__ for dataset in datasets]}\n")
+        print(f"Datasets used: {args.datasets}\n")
         dataset = data.datasets.get(args, *datasets)
         model = _dev_utils.get_model(args)
         print(f"Model used for recording:\n{model}\n")
 
-        activation_recorders = recorders.get(dataset, reduction.get(args))
-        recorders.register(model, activation_recorders)
+        activation_recorder = recorders.get(
+            dataset, reduction.get(args), reduction.statistics(args)
+        )
+        recorders.register(model, activation_recorder)
         print(f"Recording activations...\n")
         _dev_utils.record_state(model, dataset, args)
-        finalize.apply(activation_recorders, args)
+        finalize.apply(activation_recorder, args)
         print(f"Saving recorded data at: {args.save}\n")
-        recorders.save(activation_recorders, args)
+        recorders.save(activation_recorder, args)
 
     else:
         print(
@@ -44,8 +44,16 @@ def record_state(model, dataset, args):
     torch.nn.Module
 
     """
-    for element, _ in tqdm.tqdm(dataset, total=len(dataset)):
-        if args.cuda is not None:
+    # Whole batches are yielded by dataset; tasks of samples are kept in `dataset.dataset`
+    dataset.batch_size = args.batch
+    loader = torch.utils.data.DataLoader(
+        dataset, batch_size=None, num_workers=args.workers
+    )
+    for element, label in tqdm.tqdm(loader, total=-(-len(dataset) // args.batch)):
+        # Samples from workers did not update main process dataset
+        if args.workers > 0:
+            dataset.label = label
+        if args.cuda:
             element = element.cuda()
 
         model(element)
@@ -1,31 +1,56 @@
-def _variance(mean_variance, samples):
-    """Perform final variance calculations.
+def _mean(statistics):
+    """Return per-task, per-neuron mean.
 
-    `mean_variance` and `samples` were pre-recorded with
-    `options.record.reduction._variance`.
+    Parameters
+    ----------
+    statistics : statistics.Statistics
+            Running statistics of single layer.
+
+    Returns
+    -------
+    torch.Tensor
+
+    """
+    return statistics.mean
+
+
+def _variance(statistics):
+    """Return per-task, per-neuron (population) variance.
 
-    This operation only calculates total running variance.
+    Calculated from sum of squared deviations merged batch by batch
+    (see `statistics.Statistics`), hence numerically stable.
 
     This function is applied on per-recording basis (per layer to be exact).
 
     Parameters
     ----------
-    mean_variance : Tuple[torch.Tensor]
-            Running tensor containing running mean and running variance
-    samples : int
-            How many samples passed through this tensor (used for taking the mean).
+    statistics : statistics.Statistics
+            Running statistics of single layer.
 
     Returns
     -------
     torch.Tensor
-            Tensor containing per-neuron variance (exact same shape as output layer)
+            Tensor containing per-task, per-neuron variance
+
+    """
+    return statistics.variance
+
+
+def _quantiles(quantiles):
+    """Return callable calculating per-task, per-neuron quantiles.
+
+    Parameters
+    ----------
+    quantiles : typing.List[float]
+            Quantiles to calculate, each within `[0, 1]`
+
+    Returns
+    -------
+    typing.Callable[[statistics.Histogram], torch.Tensor]
+            Returns tensor of shape `(tasks, len(quantiles), *features)`
 
     """
-    mean = mean_variance[0] / samples
-    variance = mean_variance[1]
-    variance /= samples
-    variance -= mean * mean
-    return variance
+    return lambda histogram: histogram.quantile(quantiles)
 
 
 def _get(args):
@@ -38,32 +63,32 @@ def _get(args):
 
     Returns
     -------
-    typing.Callable[[torch.Tensor, int], torch.Tensor]
-            Callable getting per-layer recorded activations and number of samples
-            which passed through this layer. Returns per layer running mean or variance.
+    typing.Callable[[statistics.Statistics], torch.Tensor]
+            Callable getting per-layer statistics of recorded activations.
+            Returns per layer mean (also sparsity), variance or quantiles.
 
     """
-    if args.reduction.lower() == "mean":
-        return lambda data, samples: data / samples
+    if args.reduction.lower() in ("mean", "sparsity"):
+        return _mean
+    if args.reduction.lower() == "quantiles":
+        return _quantiles(args.quantiles)
     return _variance
 
 
-def apply(recorders, args) -> None:
-    """Apply either running mean or running variance.
+def apply(recorder, args) -> None:
+    """Apply mean, variance or quantiles.
 
-    This function is applied after `torchfunc.hooks.recorders` recorded and reduced
-    activations appropriately.
+    This function is applied after `recorders.Recorder` gathered
+    statistics of activations.
 
-    Modifies recorded data in-place.
+    Sets finalized data of recorder.
 
     Parameters
     ----------
-    recorders: typing.List[torchfunc.hooks.recorders.ForwardPre]
-            Recorders containing ForwardPre data.
+    recorder: recorders.Recorder
+            Recorder containing per-task statistics.
     args: argparse.Namespace
             argparse.ArgumentParser().parse() return value. User provided arguments.
 
     """
-    operation = _get(args)
-    for recorder in recorders:
-        recorder.apply_sample(operation)
+    recorder.finalize(_get(args))
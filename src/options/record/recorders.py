@@ -1,16 +1,20 @@
 import functools
+import json
 import pathlib
 import typing
 
-import torchfunc
+import torch
 
 import nn
 import torchlayers
 
+from .statistics import Statistics
+
 """
-Types whose inputs should be recorded using `torchfunc.hooks.recorders.ForwardPre`.
+Types whose inputs should be recorded by `Recorder`.
 
 """
+METADATA = "metadata.json"
 RECORDER_TYPES = (
     torchlayers.Linear,
     torchlayers.Conv,
@@ -19,59 +23,112 @@ RECORDER_TYPES = (
 )
 
 
-def get(dataset, reduction) -> typing.List:
-    """Get per-task layer activations.
+class Recorder:
+    """Record reduced inputs of layers separately for each task.
 
-    Those will record output from each layer as data samples pass
-    and apply either running mean or running variance reduction.
+    Single forward pre hook is registered for each layer. Every batch may contain
+    samples from different tasks; task of each sample is read from `dataset.dataset`
+    (tensor of task ids for batched dataset) and `reduction`-transformed values
+    are merged into per-task statistics of the layer (see `statistics.Statistics`).
 
     Parameters
     ----------
     dataset : torch.utils.data.Dataset
-            Specific dataset containing information about last task returned.
+            Specific dataset containing information about last task(s) returned.
             Has to be sequential, so most probably data.datasets.Sequential
             should be used here.
     reduction : typing.Callable
-            Either running mean-like or running variance-like operation
-
-    Returns
-    -------
-    typing.List[torchfunc.hooks.recorders.ForwardPre]
-            Recorders recording inner state of neural network as data passes.
-            One recorder is responsible for recording network activations
-            of one task.
+            Values (e.g. absolute activations) whose statistics are gathered
+    tasks : int
+            Number of tasks (separate datasets)
+    statistics : typing.Callable, optional
+            Creates streaming statistics of single layer given number of tasks,
+            e.g. `statistics.Histogram`. Default: `statistics.Statistics`
+
+    Attributes
+    ----------
+    statistics : typing.List
+            Running per-task statistics of each layer.
+    data : typing.List[torch.Tensor]
+            Finalized data of each layer of shape `(tasks, *features)`
+            (available after `finalize`).
 
     """
 
-    def condition(index):
-        """If `True`, record given sample.
-
-        Check whether last sample was from specified task.
-
-        Parameters
-        ----------
-        index : int
-                Task index to check against `dataset.dataset` (e.g. last used dataset/sample).
+    def __init__(self, dataset, reduction, tasks: int, statistics=Statistics):
+        self.dataset = dataset
+        self.reduction = reduction
+        self.tasks: int = tasks
+        self._statistics = statistics
+
+        self.statistics: typing.List = []
+        self.data: typing.List[torch.Tensor] = []
+        self.handles = []
+
+    def modules(self, module: torch.nn.Module, types: typing.Tuple[typing.Any]):
+        """Register hook on every submodule of `module` being one of `types`."""
+        for submodule in module.modules():
+            if isinstance(submodule, types):
+                self.handles.append(
+                    submodule.register_forward_pre_hook(
+                        functools.partial(self._hook, len(self.statistics))
+                    )
+                )
+                self.statistics.append(self._statistics(self.tasks))
+        return self
+
+    def _hook(self, index: int, module, inputs) -> None:
+        current = inputs[0].detach()
+        tasks = torch.as_tensor(self.dataset.dataset, device=current.device).view(-1)
+        self.statistics[index].update(self.reduction(current), tasks)
+
+    def finalize(self, function: typing.Callable) -> None:
+        """Set data of each layer to `function(statistics)`."""
+        self.data = [function(statistics) for statistics in self.statistics]
+
+    def task(self, index: int) -> typing.List[torch.Tensor]:
+        """Finalized data of each layer for task `index`."""
+        return [data[index] for data in self.data]
+
+    def remove(self) -> None:
+        """Remove all registered hooks."""
+        for handle in self.handles:
+            handle.remove()
+        self.handles = []
+
+
+def get(dataset, reduction, statistics=Statistics) -> Recorder:
+    """Get per-task layer activations recorder.
+
+    It will record input of each layer as data samples pass
+    and gather its streaming statistics for each task.
 
-        Returns
-        -------
-        bool
+    Parameters
+    ----------
+    dataset : torch.utils.data.Dataset
+            Specific dataset containing information about last task(s) returned.
+            Has to be sequential, so most probably data.datasets.Sequential
+            should be used here.
+    reduction : typing.Callable
+            Values (e.g. absolute activations) whose statistics are gathered
+    statistics : typing.Callable, optional
+            Creates streaming statistics of single layer given number of tasks.
+            Default: `statistics.Statistics`
 
-        """
-        return dataset.dataset == index
+    Returns
+    -------
+    Recorder
+            Recorder gathering inner state of neural network for every task
+            as data passes.
 
-    return [
-        torchfunc.hooks.recorders.ForwardPre(
-            condition=functools.partial(condition, i), reduction=reduction
-        )
-        for i in range(dataset.inner_datasets)
-    ]
+    """
+    return Recorder(dataset, reduction, dataset.inner_datasets, statistics)
 
 
-def register(model, recorders) -> None:
-    """Register recorders to the model.
+def register(model, recorder) -> None:
+    """Register recorder to the model.
 
-    Recorders will gather per-task specific activations when data goes into
+    Recorder will gather per-task specific activations when data goes into
     neural network.
 
     Parameters
@@ -79,15 +136,14 @@ def register(model, recorders) -> None:
     model: torch.nn.Module
             Module for which it's inner state (input activations of layers)
             will be recorded.
-    recorders: typing.List[torchfunc.hooks.recorders.ForwardPre]
-            Recorders to be registered
+    recorder: Recorder
+            Recorder to be registered
 
     """
-    for task_recorder in recorders:
-        task_recorder.modules(model, types=RECORDER_TYPES)
+    recorder.modules(model, types=RECORDER_TYPES)
 
 
-def save(recorders, args) -> None:
+def save(recorder, args) -> None:
     """After recording and applying final operations, save per-task activations.
 
     Appropriate folder containing per-task activations data of each layer
@@ -112,15 +168,54 @@ def save(recorders, args) -> None:
             ...
             N.pt (where N is the number of layer activations)
 
+    Each file contains per-neuron values of layer's input (without batch dimension),
+    preceded by quantile dimension for `quantiles` reduction.
+    Used reduction (and quantiles) are saved in `recorded/metadata.json`
+    (see `metadata`), so consumers never have to guess layout of files.
 
     Parameters
     ----------
-    recorders: typing.List[torchfunc.hooks.recorders.ForwardPre]
-            Recorders to be registered
+    recorder: Recorder
+            Recorder with finalized data
     args: argparse.Namespace
             argparse.ArgumentParser().parse() return value. User provided arguments.
 
     """
     path = pathlib.Path(args.save)
-    for index, task_recorder in enumerate(recorders):
-        task_recorder.save(path / str(index), mkdir=True, parents=True, exist_ok=True)
+    for index in range(recorder.tasks):
+        task_path = path / str(index)
+        task_path.mkdir(parents=True, exist_ok=True)
+        for layer, data in enumerate(recorder.task(index)):
+            # Clone so only this task's slice is serialized
+            torch.save(data.cpu().clone(), task_path / f"{layer}.pt")
+    with open(path / METADATA, "w") as file:
+        json.dump(
+            {
+                "reduction": args.reduction,
+                "quantiles": args.quantiles if args.reduction == "quantiles" else None,
+            },
+            file,
+        )
+
+
+def metadata(data) -> typing.Dict:
+    """Return reduction (and quantiles) used to create recording saved in `data`.
+
+    Parameters
+    ----------
+    data: pathlib.Path
+            Folder with recorded activations (see `save`).
+
+    Returns
+    -------
+    Dict
+            `reduction` name and list of `quantiles`. If `quantiles` is `None`
+            (also for recordings saved without metadata), files hold
+            single value per feature.
+
+    """
+    path = pathlib.Path(data) / METADATA
+    if not path.exists():
+        return {"reduction": None, "quantiles": None}
+    with open(path) as file:
+        return json.load(file)
@@ -1,52 +1,63 @@
+import functools
+
 import torch
 
+from .statistics import Histogram, Statistics
 
-def _mean(previous, current):
-    """Sum two elements with absolute value.
 
-    This operation will be applied as data passes through layer.
-    Within `finalize` you can find the final mean calculation, this is
-    kind of "running">
+def _mean(current):
+    """Mean reduction is taken over absolute values of activations.
 
     Parameters
     ----------
-    previous : torch.Tensor
-            Currently hold sum of activations (layer statistics)
-    current : type
-            New incoming activations for new data sample.
+    current : torch.Tensor
+            New incoming activations of batch of shape `(batch, *features)`.
 
     Returns
     -------
     torch.Tensor
 
     """
-    return torch.abs(previous) + torch.abs(current)
+    return torch.abs(current)
 
 
-def _variance(previous, current):
-    """Calculate mean and variance (as both are needed in final operation).
+def _variance(current):
+    """Variance reduction is taken over activations as they are.
 
     Parameters
     ----------
-    previous : torch.Tensor
-            Currently hold sum of activations (layer statistics)
-    current : type
-            New incoming activations for new data sample.
+    current : torch.Tensor
+            New incoming activations of batch of shape `(batch, *features)`.
 
     Returns
     -------
     torch.Tensor
 
     """
-    if len(previous.size()) != 2:
-        return torch.stack((previous + current, previous + current * current), dim=0)
-    previous[0] += current
-    previous[1] += current * current
-    return previous
+    return current
+
+
+def _sparsity(current):
+    """Sparsity is the mean of indicator whether activation is exactly zero.
+
+    Parameters
+    ----------
+    current : torch.Tensor
+            New incoming activations of batch of shape `(batch, *features)`.
+
+    Returns
+    -------
+    torch.Tensor
+
+    """
+    return (current == 0).to(current)
 
 
 def get(args):
-    """Return either running mean or variance operation.
+    """Return values whose per-task statistics are gathered for mean or variance.
+
+    Statistics themselves are kept by `statistics.Statistics`, see `finalize`
+    for obtaining mean or variance from them.
 
     Parameters
     ----------
@@ -61,4 +72,28 @@ def get(args):
     """
     if args.reduction.lower() == "mean":
         return _mean
+    if args.reduction.lower() == "sparsity":
+        return _sparsity
     return _variance
+
+
+def statistics(args):
+    """Return streaming statistics gathered for each layer.
+
+    Quantiles are read from fixed-size histograms, every other reduction
+    needs only running moments.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+            argparse.ArgumentParser().parse() return value. User provided arguments.
+
+    Returns
+    -------
+    typing.Callable[[int], Statistics | Histogram]
+            Callable taking number of tasks.
+
+    """
+    if args.reduction.lower() == "quantiles":
+        return functools.partial(Histogram, bins=args.bins)
+    return Statistics
@@ -0,0 +1,167 @@
+import torch
+
+
+class Statistics:
+    """Running per-task statistics of layer's inputs.
+
+    Keeps count, mean and sum of squared deviations from the mean (`m2`)
+    of shape `(tasks, *features)` (count is `(tasks,)`).
+    Each batch is reduced with a few `index_add_` calls and merged into
+    running values with Chan et al. parallel algorithm (generalization of
+    Welford's), so variance does not suffer from cancellation like
+    `E[x^2] - E[x]^2` does.
+
+    Parameters
+    ----------
+    tasks : int
+            Number of tasks
+
+    """
+
+    def __init__(self, tasks: int):
+        self.tasks: int = tasks
+        self.count: torch.Tensor = None
+        self.mean: torch.Tensor = None
+        self.m2: torch.Tensor = None
+
+    def update(self, values, tasks) -> None:
+        """Merge statistics of batch into running ones.
+
+        Parameters
+        ----------
+        values : torch.Tensor
+                Batch of shape `(batch, *features)`
+        tasks : torch.Tensor
+                Task index of each sample in batch
+
+        """
+        if self.count is None:
+            self.count = values.new_zeros((self.tasks,))
+            self.mean = values.new_zeros((self.tasks, *values.shape[1:]))
+            self.m2 = torch.zeros_like(self.mean)
+
+        count = torch.bincount(tasks, minlength=self.tasks).to(values)
+        mean = values.new_zeros(self.mean.shape).index_add_(0, tasks, values)
+        mean /= self._broadcast(count.clamp(min=1))
+        deviations = values - mean[tasks]
+        m2 = values.new_zeros(self.m2.shape).index_add_(
+            0, tasks, deviations * deviations
+        )
+
+        total = self.count + count
+        delta = mean - self.mean
+        weight = self._broadcast(count / total.clamp(min=1))
+        self.mean += delta * weight
+        self.m2 += m2 + delta * delta * self._broadcast(self.count) * weight
+        self.count = total
+
+    def _broadcast(self, per_task):
+        return per_task.view(-1, *([1] * (self.mean.dim() - 1)))
+
+    @property
+    def sum(self) -> torch.Tensor:
+        return self.mean * self._broadcast(self.count)
+
+    @property
+    def variance(self) -> torch.Tensor:
+        """Population variance (zero for tasks without samples)."""
+        return self.m2 / self._broadcast(self.count.clamp(min=1))
+
+
+class Histogram:
+    """Streaming per-task, per-neuron histogram of layer's inputs.
+
+    Each neuron has `bins` equally wide bins shared by all tasks, initialized
+    to span values of the first batch. Whenever values fall outside of neuron's
+    range, it is doubled (pairs of neighbouring bins are merged), so memory
+    stays `tasks * features * bins` no matter how many samples pass.
+    Quantiles are interpolated within bins (resolution is range / bins).
+    Infinite values do not change ranges and are counted in the edge bins,
+    `NaN` values are not counted at all.
+
+    Parameters
+    ----------
+    tasks : int
+            Number of tasks
+    bins : int, optional
+            Number of bins per neuron (has to be even). Default: `256`
+
+    """
+
+    def __init__(self, tasks: int, bins: int = 256):
+        self.tasks: int = tasks
+        self.bins: int = bins
+        self.shape = None
+        # Shapes: (tasks, features, bins), (features,), (features,)
+        self.counts: torch.Tensor = None
+        self.low: torch.Tensor = None
+        self.width: torch.Tensor = None
+
+    def update(self, values, tasks) -> None:
+        """Add batch of shape `(batch, *features)` to histograms of respective tasks."""
+        if self.counts is None:
+            self.shape = values.shape[1:]
+        values = values.flatten(start_dim=1)
+        # Ranges would be doubled forever to reach infinity
+        finite = values.isfinite()
+        minimum = torch.where(finite, values, float("inf")).min(dim=0).values
+        maximum = torch.where(finite, values, float("-inf")).max(dim=0).values
+        if self.counts is None:
+            self.counts = values.new_zeros((self.tasks, values.shape[1], self.bins))
+            self.low = torch.where(finite.any(dim=0), minimum, 0.0)
+            self.width = ((maximum - minimum) / self.bins).clamp(min=1e-6)
+
+        while True:
+            down = minimum < self.low
+            up = maximum >= self.low + self.width * self.bins
+            grow = up | down
+            if not grow.any():
+                break
+            self._double(grow, down & grow)
+
+        indices = ((values - self.low) / self.width).nan_to_num(
+            posinf=self.bins - 1, neginf=0
+        )
+        indices = indices.long().clamp_(0, self.bins - 1)
+        indices += torch.arange(values.shape[1], device=values.device) * self.bins
+        indices += tasks.unsqueeze(-1) * values.shape[1] * self.bins
+        self.counts.view(-1).index_add_(
+            0, indices.view(-1), (~values.isnan()).to(values).view(-1)
+        )
+
+    def _double(self, grow, down) -> None:
+        """Double range of `grow` neurons (towards lower values for `down` ones)."""
+        merged = self.counts[:, grow].view(self.tasks, -1, self.bins // 2, 2).sum(-1)
+        empty = torch.zeros_like(merged)
+        self.counts[:, grow] = torch.where(
+            down[grow].view(1, -1, 1),
+            torch.cat((empty, merged), dim=-1),
+            torch.cat((merged, empty), dim=-1),
+        )
+        self.low = torch.where(down, self.low - self.width * self.bins, self.low)
+        self.width = torch.where(grow, self.width * 2, self.width)
+
+    def quantile(self, quantiles) -> torch.Tensor:
+        """Return per-task quantiles of shape `(tasks, len(quantiles), *features)`.
+
+        Parameters
+        ----------
+        quantiles : torch.Tensor
+                Quantiles to calculate, each within `[0, 1]`
+
+        """
+        quantiles = torch.as_tensor(quantiles).to(self.counts)
+        cumulative = self.counts.cumsum(dim=-1)
+        targets = quantiles * cumulative[..., -1:]
+        bins = torch.searchsorted(cumulative, targets).clamp_(max=self.bins - 1)
+        before = torch.where(
+            bins > 0,
+            cumulative.gather(-1, (bins - 1).clamp(min=0)),
+            torch.zeros_like(targets),
+        )
+        inside = self.counts.gather(-1, bins)
+        fraction = ((targets - before) / inside.clamp(min=1)).clamp_(0, 1)
+        values = self.low.unsqueeze(-1) + self.width.unsqueeze(-1) * (bins + fraction)
+        return values.transpose(1, 2).reshape(
+            self.tasks, len(quantiles), *self.shape
+        )
@@ -18,27 +18,30 @@ def run(args):
     # Setup appropriate model and data
     # Datasets specified by user
     datasets = get_datasets(args, train=args.train)
-    print(f"Datasets used: {[type(dataset).__name__ for dataset in datasets]}\n")
+    print(f"Datasets used: {args.datasets}\n")
 
     dataset = data.datasets.get(args, *datasets)
-    models = _dev_utils.get_models(args.models)
+    models = list(_dev_utils.get_models(args.models))
     writer = SummaryWriter(log_dir=args.tensorboard)
     for task, model in enumerate(models):
-        print(
-            f"==================================TASK {task}======================================"
+        print(f"Model {task}:\n {model}")
+
+    loss = nn.loss.get(args, models[0])
+
+    # Every batch is loaded once and passed through all models
+    single_pass = nn.passes.MultiValidation(models, loss, args.cuda)
+    loop = nn.train.get_loop(
+        single_pass, dataset, hyperparams, args.workers, args.prefetch
+    )
+    gatherers = [
+        nn.metrics.get(
+            writer,
+            dataset,
+            stage=f"SingleTaskModel{task}",
+            tasks=len(datasets),
+            input_type=args.input,
         )
-        print(f"Model:\n {model}")
+        for task in range(len(models))
+    ]
 
-        # Model is needed to register it's params for transport & proximity loss functions
-        loss = nn.loss.get(args, model)
-
-        # New, better logging of results into tensorboard
-        single_pass = nn.passes.Validation(model, loss, args.cuda)
-        loop = nn.train.get_loop(single_pass, dataset, hyperparams)
-        gatherer = nn.metrics.get(
-            writer, dataset, stage=f"SingleTaskModel{task}", tasks=len(datasets), input_type=args.input
-        )
-
-        # Run training and validation
-        _dev_utils.run(loop, gatherer)
-        print("\n")
+    _dev_utils.run(loop, gatherers)
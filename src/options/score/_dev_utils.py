@@ -7,28 +7,43 @@ import torchfunc
 
 import nn
 
+from ..split import artifact
+
 
 def get_models(folder: pathlib.Path):
     """Obtain per-task models from `folder`.
 
+    If `folder` contains split artifact (see `options.split.artifact`),
+    base model is loaded once and per-task models share its parameters.
+    Otherwise every file is loaded as separate model.
+
     Yields
     ------
     torch.nn.Module
         Consecutive splitted models
 
     """
+    if artifact.exists(folder):
+        yield from artifact.Split.load(folder)
+        return
     for path in sorted(pathlib.Path(folder).glob("*")):
         yield torch.load(path)
 
 
-def run(loop, gatherer) -> None:
-    """Run validation loop and print gathered results."""
-    for result in loop():
-        gatherer(result)
-    print(
-        "=================================RESULTS======================================"
-    )
-    nn.metrics.print_results(gatherer.get())
-    print(
-        "===================================END========================================"
-    )
+def run(loop, gatherers) -> None:
+    """Run validation loop of all models and print gathered results of each."""
+    for results in loop():
+        for gatherer, result in zip(gatherers, results):
+            gatherer(result)
+    for task, gatherer in enumerate(gatherers):
+        print(
+            f"==================================TASK {task}======================================"
+        )
+        print(
+            "=================================RESULTS======================================"
+        )
+        nn.metrics.print_results(gatherer.get())
+        print(
+            "===================================END========================================"
+        )
+        print("\n")
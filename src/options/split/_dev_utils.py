@@ -1,3 +1,8 @@
+import concurrent.futures
+import dataclasses
+import itertools
+import json
+import multiprocessing
 import pathlib
 import typing
 
@@ -6,6 +11,8 @@ import torchfunc
 
 import nn
 
+from . import _maskers, activations, artifact, backward, prune
+
 
 def get_model(args):
     """Load trained model to be splitted.
@@ -44,28 +51,27 @@ def get_tasks(args, model) -> int:
     """
     return list(model.modules())[-1].weight.shape[0] // args.labels
 
-def get_masks(args, tasks, masker: typing.Callable):
+def get_masks(model, tasks, masker: typing.Callable):
     """Generate masks of task assignment for each layer
 
     Parameters
     ----------
-    args: argparse.Namespace
-            argparse.ArgumentParser().parse() return value. User provided arguments.
+    model: torch.nn.Module
+            Frozen module in evaluation mode.
     tasks: int
             How many tasks were done within original network.
     masker:
             Object creating and applying masks to neural network layers
 
-    Yields
+    Returns
     -------
     list
             List of torch tensors representing the masks.
 
     """
     with torch.no_grad():
-        model = get_model(args)
         reversed_modules = reversed(list(model.modules()))
-        output_mask = torch.tensor(list(range(tasks)) * args.labels)
+        output_mask = torch.tensor(list(range(tasks)) * masker.labels)
         reversed_masks = [
             masker(module) for module in reversed_modules
             if nn.layers.spatial(module)
@@ -75,36 +81,185 @@ def get_masks(args, tasks, masker: typing.Callable):
     return masks
 
 
-def generate_networks(args, tasks, masker: typing.Callable):
-    """Generate splitted per-task neural networks.
+@dataclasses.dataclass(frozen=True)
+class Variant:
+    """Single configuration of split sweep.
+
+    Parameters
+    ----------
+    method: str
+            Name of masker (module of `backward` package).
+    seed: Optional[int]
+            Seed set before creating masks (`None` keeps random state untouched).
+    where: Tuple[int]
+            Indices of spatial layers which are split.
+
+    """
+
+    method: str
+    seed: typing.Optional[int]
+    where: typing.Tuple[int]
+
+    @property
+    def name(self) -> str:
+        seed = "" if self.seed is None else f"_seed{self.seed}"
+        return f"{self.method}{seed}_where{'-'.join(map(str, self.where))}"
+
+
+def get_variants(args, model) -> typing.List[Variant]:
+    """All combinations of `method`, `seeds` and `where` specified by user.
+
+    Deterministic maskers (e.g. `greedy`) are not repeated for each seed.
+
+    """
+    layers = sum(1 for module in model.modules() if nn.layers.spatial(module))
+    wheres = args.where if args.where is not None else [list(range(layers))]
+    seeds = args.seeds if args.seeds is not None else [None]
+    variants = []
+    for method in args.method:
+        stochastic = _maskers.get(method).Masker.stochastic
+        for seed in seeds if stochastic else [None]:
+            for where in wheres:
+                variants.append(Variant(method, seed, tuple(where)))
+    return variants
+
+
+# Model shared with pool's processes (inherited on fork, not pickled for each job)
+_MODEL = None
+
+
+def _share(model) -> None:
+    global _MODEL
+    _MODEL = model
+    # Jobs run in parallel, each should use single core
+    if multiprocessing.current_process().name != "MainProcess":
+        torch.set_num_threads(1)
+
+
+def _masks(method: str, seed, labels: int, tasks: int):
+    if seed is not None:
+        torch.manual_seed(seed)
+    return get_masks(_MODEL, tasks, backward.get(method).Masker(labels))
+
+
+def compute_masks(args, model, tasks, variants):
+    """Compute masks of every distinct `(method, seed)` of `variants` once.
+
+    Masks are created by `workers` processes (in the main process if `0`);
+    `activations` masks are always created in the main process.
+
+    Returns
+    -------
+    Dict[Tuple[str, Optional[int]], List[torch.Tensor]]
+            Masks of each spatial layer keyed by `(method, seed)`.
+
+    """
+    jobs = list(dict.fromkeys((variant.method, variant.seed) for variant in variants))
+    masks = {}
+    # Streams recorded data from disk, done in the main process
+    if ("activations", None) in jobs:
+        jobs.remove(("activations", None))
+        masks[("activations", None)] = activations.get_masks(args, model, tasks)
+    if not jobs:
+        return masks
+
+    if args.workers == 0:
+        _share(model)
+        results = [_masks(method, seed, args.labels, tasks) for method, seed in jobs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            args.workers, initializer=_share, initargs=(model,)
+        ) as executor:
+            results = list(
+                executor.map(
+                    _masks,
+                    *zip(*jobs),
+                    itertools.repeat(args.labels),
+                    itertools.repeat(tasks),
+                )
+            )
+    masks.update(zip(jobs, results))
+    return masks
+
+
+def generate_networks(args, model, tasks):
+    """Generate split artifacts describing per-task neural networks.
+
+    Original model is saved once, together with masks of layers specified
+    by `where` (see `artifact` module); per-task models are created from
+    them when loaded.
+    If `prune` is specified, physically smaller per-task models are also
+    saved inside `pruned` subfolder (see `prune` module).
+
+    If single variant (method, seed and `where`) is specified, artifact is
+    saved directly inside `save` folder. Otherwise (sweep) each variant gets
+    its own subfolder (sharing `save/base.pt`) and `save/variants.json`
+    summarizes all of them (see `summary`).
 
     Parameters
     ----------
     args: argparse.Namespace
             argparse.ArgumentParser().parse() return value. User provided arguments.
+    model: torch.nn.Module
+            Frozen module in evaluation mode.
     tasks: int
             How many tasks were done within original network.
-    masker:
-            Object creating and applying masks to neural network layers
 
-    Yields
+    Returns
     -------
-    torch.nn.Module
-            Module with per-task masks applied.
+    List[artifact.Split]
+            Saved split artifacts (one per variant).
 
     """
     path = pathlib.Path(args.save)
-    path.mkdir(parents=True, exist_ok=True)
-
-    masks = get_masks(args, tasks, masker)
-
-    for task in range(tasks):
-        model = get_model(args)
-        layer_idx = 0
-        for module in model.modules():
-            if nn.layers.spatial(module):
-                print(masks[layer_idx].shape, module)
-                if layer_idx in args.where:
-                    masker.apply(module.weight.data, masks[layer_idx], task)
-                layer_idx += 1
-        torch.save(model, path / f"{task}.pt")
+    variants = get_variants(args, model)
+    masks = compute_masks(args, model, tasks, variants)
+
+    single = len(variants) == 1
+    if not single:
+        path.mkdir(parents=True, exist_ok=True)
+        torch.save(model, path / artifact.BASE)
+
+    splits, summaries = [], []
+    for variant in variants:
+        variant_masks = masks[(variant.method, variant.seed)]
+        split = artifact.Split(
+            model,
+            variant.method,
+            args.labels,
+            tasks,
+            {layer_idx: variant_masks[layer_idx] for layer_idx in variant.where},
+        )
+        folder = path if single else path / variant.name
+        split.save(folder, base=None if single else path / artifact.BASE)
+        print(f"Saved {variant.name} at {folder}")
+
+        if args.prune:
+            pruned_path = folder / "pruned"
+            pruned_path.mkdir(parents=True, exist_ok=True)
+            for task in range(tasks):
+                pruned = split.pruned(task)
+                print(f"Task {task} pruned layer widths: {prune.widths(pruned)}")
+                torch.save(pruned, pruned_path / f"{task}.pt")
+
+        splits.append(split)
+        summaries.append(
+            {**dataclasses.asdict(variant), "folder": str(folder), **summary(split)}
+        )
+
+    if not single:
+        with open(path / "variants.json", "w") as file:
+            json.dump(summaries, file, indent=2)
+    return splits
+
+
+def summary(split) -> typing.Dict:
+    """Number of neurons kept for each task in every split layer."""
+    return {
+        "kept": {
+            layer: [
+                int(backward.kept(mask, task).sum()) for task in range(split.tasks)
+            ]
+            for layer, mask in split.masks.items()
+        }
+    }
@@ -0,0 +1,8 @@
+from . import activations, backward
+
+
+def get(method: str):
+    """Return module providing `Masker` of split `method` (e.g. `greedy`)."""
+    if method == "activations":
+        return activations
+    return backward.get(method)
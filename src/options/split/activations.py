@@ -1,67 +1,176 @@
-import copy
+"""
+Split based on per-task activations recorded by `record`.
+
+Each neuron is assigned to the task for which its recorded value (e.g. mean
+absolute activation) is the largest. Recorded files are streamed: only one
+task's data of single layer is loaded at a time (optionally memory-mapped)
+and running maximum over tasks is kept, so recorded layers never
+have to fit in memory all at once.
+
+Masks have the same format as `greedy` ones (task index of each neuron)
+and are applied through the unified masker API (see `backward._base.Base`).
+
+"""
+
 import pathlib
+import typing
 
 import torch
-import torchfunc
 
-###############################################################################
-#
-#                               TO BE FIXED
-#
-###############################################################################
+import nn
+
+from ..record import recorders
+from .backward import _base
+
+
+class Masker(_base.Base):
+    """Assign each neuron to the task it is the most active for.
+
+    Instead of module, called with per-task values of layer's neurons.
+
+    Parameters
+    ----------
+    labels: int
+            How many labels were used for each task
+    last: Optional[torch.Tensor]
+            Last mask created by masker
+
+    """
+
+    def __call__(self, values: typing.Iterable[torch.Tensor]):
+        """Create mask from per-neuron values of each task (streamed one by one).
+
+        Parameters
+        ----------
+        values : Iterable[torch.Tensor]
+                Values of shape `(neurons,)` for consecutive tasks
+
+        Returns
+        -------
+        torch.Tensor
+                Task index of each neuron (first task wins ties, like `argmax`)
+
+        """
+        maximum, self.last = None, None
+        for task, task_values in enumerate(values):
+            if maximum is None:
+                maximum = task_values.clone()
+                self.last = torch.zeros_like(maximum, dtype=torch.long)
+                continue
+            larger = task_values > maximum
+            maximum = torch.where(larger, task_values, maximum)
+            self.last[larger] = task
+        self.tasks = task + 1
+        return self.last
+
+    def create(self, summed):
+        return summed.argmax(dim=0)
+
+
+def get_tasks(data) -> typing.List[pathlib.Path]:
+    """Return folders with recorded activations of each task (in order)."""
+    return sorted(
+        (path for path in pathlib.Path(data).iterdir() if path.is_dir()),
+        key=lambda path: int(path.name),
+    )
+
+
+def per_neuron(values, quantiles: bool = False) -> torch.Tensor:
+    """Reduce recorded values of layer to single value per neuron (channel).
+
+    Parameters
+    ----------
+    values: torch.Tensor
+            Values of shape `(*features)` or `(quantiles, *features)`.
+    quantiles: bool, optional
+            Whether `values` have leading quantile dimension (see `recorders.metadata`).
+            Default: `False`
+
+    Returns
+    -------
+    torch.Tensor
+            Values of shape `(features[0],)`. Quantiles are averaged and
+            spatial dimensions (convolution) summed.
+
+    """
+    if quantiles:
+        values = values.mean(dim=0)
+    return values.reshape(values.shape[0], -1).sum(dim=-1)
+
+
+def neurons(
+    path, count: int, mmap: bool = False, quantiles: bool = False
+) -> torch.Tensor:
+    """Load recorded layer input and reduce it to single value per neuron.
+
+    Parameters
+    ----------
+    path: pathlib.Path
+            File saved by `record` containing values of shape `(*features)`
+            or `(quantiles, *features)`.
+    count: int
+            Number of neurons (channels) of the layer, e.g. `out_features`
+    mmap: bool, optional
+            Whether file should be memory-mapped instead of read into memory.
+            Default: `False`
+    quantiles: bool, optional
+            Whether file has leading quantile dimension (see `recorders.metadata`).
+            Default: `False`
+
+    Returns
+    -------
+    torch.Tensor
+            Values of shape `(count,)` (see `per_neuron`).
+
+    """
+    values = torch.load(path, map_location="cpu", mmap=mmap)
+    reduced = per_neuron(values, quantiles)
+    if reduced.shape[0] != count:
+        raise ValueError(
+            f"Values of shape {tuple(values.shape)} recorded in {path} "
+            f"do not match layer with {count} neurons."
+        )
+    return reduced
+
+
+def get_masks(args, model, tasks: int):
+    """Generate masks of task assignment for each layer from recorded activations.
 
+    Input of layer `i + 1` (recorded file) decides assignment of neurons of layer `i`.
+    Output layer is assigned just like for `backward` maskers.
 
-def get_data(data):
-    for task in pathlib.Path(data).glob("*"):
-        yield [torch.load(layer).cpu() for layer in sorted(list(task.glob("*")))]
+    Parameters
+    ----------
+    args: argparse.Namespace
+            argparse.ArgumentParser().parse() return value. User provided arguments.
+    model: torch.nn.Module
+            Frozen module in evaluation mode.
+    tasks: int
+            How many tasks were done within original network.
 
+    Returns
+    -------
+    list
+            List of torch tensors representing the masks.
 
-def get_max_activations(data):
-    return list(
-        map(
-            lambda tensor: torch.argmax(tensor, dim=0),
-            (torch.stack(layers) for layers in zip(*data)),
+    """
+    folders = get_tasks(args.data)
+    if len(folders) != tasks:
+        raise ValueError(
+            f"Activations of {len(folders)} tasks recorded in {args.data}, "
+            f"model was trained on {tasks} tasks."
         )
-    )[
-        1:
-    ]  # Ignore first recorded activation as it's input related
-
-
-def slice_model(model, max_activations):
-    models = []
-    # Iterate over tasks
-    for i in range(len(max_activations)):
-        new_model = copy.deepcopy(model)
-        for max_activation, layer in zip(
-            max_activations,
-            (layer for layer in new_model.modules() if hasattr(layer, "weight")),
-        ):
-            layer.weight *= (max_activation == i).unsqueeze(dim=1).to(layer.weight)
-
-        models.append(new_model)
-    return models
-
-
-def save_models(args, models):
-    save_path = pathlib.Path(args.save)
-    save_path.mkdir(parents=True, exist_ok=True)
-    for i, model in enumerate(models):
-        model_path = save_path / f"task{i}.pt"
-        print(f"Saving task {i} model at {model_path}")
-        torch.save(model, model_path)
-
-
-def run(args):
-    print("Getting data...")
-    data = list(get_data(args.data))
-    print("Processing activations...")
-    max_activations = get_max_activations(data)
-
-    print("Loading model...")
-    model = torch.load(args.model)
-    model.eval()
-    torchfunc.module.freeze(model)
-
-    print("Slicing model...")
-    models = slice_model(model, max_activations)
-    save_models(args, models)
+    quantiles = recorders.metadata(args.data)["quantiles"] is not None
+    spatial = [module for module in model.modules() if nn.layers.spatial(module)]
+    masker = Masker(args.labels)
+    masks = []
+    with torch.no_grad():
+        for index, module in enumerate(spatial[:-1]):
+            count = module.weight.shape[0]
+            masks.append(
+                masker(
+                    neurons(folder / f"{index + 1}.pt", count, args.mmap, quantiles)
+                    for folder in folders
+                )
+            )
+    return masks + [torch.tensor(list(range(tasks)) * args.labels)]
@@ -0,0 +1,229 @@
+"""
+Compact split artifact: single base model and per-task masks of its layers.
+
+Instead of saving full copy of the network for each task, `split` saves
+(inside `--save` folder):
+
+    base.pt - original (frozen) model
+    masks.pt - masks of split layers (task index of each neuron for `greedy`,
+               per-task boolean masks for `probability` and `rescale`)
+               and information on how to apply them
+
+Multiple artifacts (e.g. split sweep) may share single `base.pt`,
+`masks.pt` keeps path to it relative to its own folder.
+
+Per-task models are views of the base model (see `Masked`), so single
+copy of parameters is loaded and kept in memory no matter the number of tasks.
+
+"""
+
+import os
+import pathlib
+import typing
+
+import torch
+
+import nn
+
+from . import _maskers, prune
+
+BASE = "base.pt"
+MASKS = "masks.pt"
+
+
+def exists(folder) -> bool:
+    """Return True if `folder` contains split artifact."""
+    return (pathlib.Path(folder) / MASKS).exists()
+
+
+def _copy(module: torch.nn.Module, memo=None) -> torch.nn.Module:
+    """Copy `module` with cloned parameters and buffers without pickling it.
+
+    `copy.deepcopy` goes through `__reduce__`, which torchlayers replaces
+    with one dropping shape-inferred wrappers (hence changing structure).
+    Modules used multiple times (e.g. activation) are copied once.
+
+    """
+    if memo is None:
+        memo = {}
+    if id(module) in memo:
+        return memo[id(module)]
+    clone = object.__new__(type(module))
+    clone.__dict__.update(
+        {
+            key: value.copy() if isinstance(value, dict) else value
+            for key, value in module.__dict__.items()
+        }
+    )
+    memo[id(module)] = clone
+    for name, parameter in module._parameters.items():
+        if parameter is not None:
+            clone._parameters[name] = torch.nn.Parameter(
+                parameter.detach().clone(), parameter.requires_grad
+            )
+    for name, buffer in module._buffers.items():
+        if buffer is not None:
+            clone._buffers[name] = buffer.clone()
+    for name, submodule in module._modules.items():
+        if submodule is not None:
+            clone._modules[name] = _copy(submodule, memo)
+    return clone
+
+
+def _compact(mask: torch.Tensor, tasks: int) -> torch.Tensor:
+    """Store task indices with the smallest sufficient integer type."""
+    if mask.dtype == torch.bool or tasks - 1 > torch.iinfo(torch.uint8).max:
+        return mask
+    return mask.to(torch.uint8)
+
+
+class Split:
+    """Base model and masks specifying its per-task subnetworks.
+
+    Indexing returns per-task model (`Masked`) created on demand.
+
+    Parameters
+    ----------
+    model: torch.nn.Module
+            Base (original) model.
+    method: str
+            Name of masker used to create masks (e.g. `greedy`).
+    labels: int
+            How many labels were used for each task
+    tasks: int
+            Number of tasks (subnetworks).
+    masks: Dict[int, torch.Tensor]
+            Masks of split layers keyed by index of spatial layer.
+
+    """
+
+    def __init__(
+        self,
+        model,
+        method: str,
+        labels: int,
+        tasks: int,
+        masks: typing.Dict[int, torch.Tensor],
+    ):
+        self.model = model
+        self.method: str = method
+        self.labels: int = labels
+        self.tasks: int = tasks
+        self.masks: typing.Dict[int, torch.Tensor] = {
+            layer: _compact(mask, tasks) for layer, mask in masks.items()
+        }
+        self.masker = _maskers.get(method).Masker(labels)
+
+        # Weight may be owned by inner module (e.g. convolution), hence
+        # its name is found by identity instead of spatial module's name
+        names = {
+            id(parameter): name for name, parameter in self.model.named_parameters()
+        }
+        spatial = [
+            module for module in self.model.modules() if nn.layers.spatial(module)
+        ]
+        self._names = {layer: names[id(spatial[layer].weight)] for layer in self.masks}
+
+    def __len__(self):
+        return self.tasks
+
+    def __getitem__(self, task: int):
+        if not 0 <= task < self.tasks:
+            raise IndexError(f"Task {task} out of range for {self.tasks} tasks.")
+        return Masked(self, task)
+
+    def __iter__(self):
+        return (self[task] for task in range(self.tasks))
+
+    def save(self, folder, base=None) -> None:
+        """Save artifact inside `folder`.
+
+        Parameters
+        ----------
+        folder: pathlib.Path
+                Folder where masks (and base model) will be saved.
+        base: pathlib.Path, optional
+                Already saved base model shared by multiple artifacts (e.g. sweep
+                of split variants). If specified, only masks are saved and they
+                refer to `base`. Default: base model saved inside `folder`
+
+        """
+        folder = pathlib.Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        if base is None:
+            torch.save(self.model, folder / BASE)
+            base = folder / BASE
+        torch.save(
+            {
+                "base": os.path.relpath(base, folder),
+                "method": self.method,
+                "labels": self.labels,
+                "tasks": self.tasks,
+                "masks": self.masks,
+            },
+            folder / MASKS,
+        )
+
+    @classmethod
+    def load(cls, folder):
+        folder = pathlib.Path(folder)
+        state = torch.load(folder / MASKS)
+        # Base model is pickled whole (not only its weights)
+        model = torch.load(folder / state.pop("base", BASE), weights_only=False)
+        model.eval()
+        return cls(model, **state)
+
+    def weights(self, task: int) -> typing.Dict[str, torch.Tensor]:
+        """Return masked weights of split layers for `task` keyed by parameter name."""
+        parameters = dict(self.model.named_parameters())
+        weights = {}
+        for layer, mask in self.masks.items():
+            name = self._names[layer]
+            weight = parameters[name].detach().clone()
+            self.masker.apply(weight, mask.to(weight.device), task)
+            weights[name] = weight
+        return weights
+
+    def materialize(self, task: int) -> torch.nn.Module:
+        """Return standalone copy of base model with masks of `task` applied."""
+        model = _copy(self.model)
+        parameters = dict(model.named_parameters())
+        with torch.no_grad():
+            for name, weight in self.weights(task).items():
+                parameters[name].copy_(weight)
+        return model
+
+    def pruned(self, task: int) -> torch.nn.Module:
+        """Return standalone model of `task` with dead neurons removed (see `prune`)."""
+        return prune.prune(self.materialize(task))
+
+
+class Masked(torch.nn.Module):
+    """Per-task view of split base model.
+
+    Masked weights are created during each forward pass (one elementwise
+    operation per split layer) and swapped into the base model via
+    `torch.func.functional_call`, so all views share base parameters.
+
+    Parameters
+    ----------
+    split: Split
+            Split artifact.
+    task: int
+            Index of task whose subnetwork is used.
+
+    """
+
+    def __init__(self, split: Split, task: int):
+        super().__init__()
+        self.model = split.model
+        self.task: int = task
+        self._split = split
+
+    def forward(self, inputs):
+        return torch.func.functional_call(
+            self.model, self._split.weights(self.task), (inputs,)
+        )
+
+    def extra_repr(self):
+        return f"task={self.task}, masked layers={sorted(self._split.masks)}"
@@ -1 +1,7 @@
 from . import greedy, probability, rescale
+from ._base import kept
+
+
+def get(method: str):
+    """Return module of masker named `method` (e.g. `greedy`)."""
+    return {"greedy": greedy, "probability": probability, "rescale": rescale}[method]
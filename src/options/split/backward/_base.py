@@ -4,12 +4,54 @@ import dataclasses
 import torch
 
 
+def summed(weight, mask, tasks: int):
+    """Sum rows of `weight` belonging to each task in a single operation.
+
+    Parameters
+    ----------
+    weight : torch.Tensor
+            Weight of shape `(rows, columns)`
+    mask : torch.Tensor
+            Either task index of each row of shape `(rows,)` (rows are
+            summed via `index_add_`) or boolean mask of shape `(tasks, rows)`
+            specifying rows of each task (summed via matrix multiplication)
+    tasks : int
+            Number of tasks
+
+    Returns
+    -------
+    torch.Tensor
+            Per-task sums of shape `(tasks, columns)`
+
+    """
+    if mask.dtype == torch.bool:
+        return mask.to(weight.dtype) @ weight
+    return weight.new_zeros((tasks, weight.shape[1])).index_add_(
+        0, mask.to(device=weight.device, dtype=torch.long), weight
+    )
+
+
+def kept(mask, task: int):
+    """Boolean mask of rows kept for `task` (see `summed` for `mask` formats)."""
+    if mask.dtype == torch.bool:
+        return mask[task]
+    return mask == task
+
+
 @dataclasses.dataclass
 class Base:
     """Convenience base class defining masking API.
 
-    When called, either runs `first` or `rest` and returns appropriate mask.
-    Should be inherited and have `first`, `rest` and `apply` methods implemented.
+    Masks are created from the last layer to the first one. Rows (output neurons)
+    of each layer are assigned to tasks; weights of rows belonging to each task
+    are summed (see `summed`) and `create` decides which columns (neurons of
+    previous layer) will belong to which task(s).
+    Initially output neuron `i` belongs to task `i % tasks`.
+
+    Cost of creating a mask does not depend on number of tasks
+    (single `index_add_` or matrix multiplication per layer).
+
+    Should be inherited and have `create` method implemented.
 
     Parameters
     ----------
@@ -17,28 +59,41 @@ class Base:
             How many labels were used for each task
     last: Optional[torch.Tensor]
             Last mask created by masker
+    tasks: Optional[int]
+            Number of tasks (inferred from the last layer)
+
+    Attributes
+    ----------
+    stochastic: bool
+            Whether masks are random (depend on seed). Default: `False`
 
     """
 
     labels: int
 
+    stochastic = False
+
     def __post_init__(self):
         self.reset()
 
     def __call__(self, module):
         weight = torch.abs(module.weight.data)
+        if weight.dim() > 2:
+            # Convolution kernels are summed, channels act like neurons
+            weight = weight.flatten(start_dim=2).sum(dim=-1)
         if self.last is None:
-            self.last = self.first(weight)
+            self.tasks = weight.shape[0] // self.labels
+            self.last = self.create(self.first(weight))
         else:
-            self.last = self.rest(weight)
+            self.last = self.create(self.rest(weight))
         return self.last
 
     def reset(self):
         self.last: torch.Tensor = None
+        self.tasks: int = None
 
-    @abc.abstractmethod
     def first(self, weight):
-        """How to create mask during first pass.
+        """Per-task sums of `weight` rows during first pass (output layer).
 
         Parameters
         ----------
@@ -48,16 +103,19 @@ class Base:
         Returns
         -------
         torch.Tensor
-                Slicing mask
+                Summed weights of shape `(tasks, columns)`
 
         """
-        pass
+        return summed(
+            weight,
+            torch.arange(weight.shape[0], device=weight.device) % self.tasks,
+            self.tasks,
+        )
 
-    @abc.abstractmethod
     def rest(self, weight):
-        """How to create mask during consecutive passes.
+        """Per-task sums of `weight` rows during consecutive passes.
 
-        Should be dependent on already existing `self.last` mask.
+        Rows are assigned to tasks by already existing `self.last` mask.
 
         Parameters
         ----------
@@ -67,16 +125,34 @@ class Base:
         Returns
         -------
         torch.Tensor
-                Slicing mask
+                Summed weights of shape `(tasks, columns)`
 
         """
-        pass
+        return summed(weight, self.last, self.tasks)
 
     @abc.abstractmethod
+    def create(self, summed):
+        """Create mask from per-task summed weights.
+
+        Parameters
+        ----------
+        summed : torch.Tensor
+                Per-task summed absolute weights of shape `(tasks, columns)`
+
+        Returns
+        -------
+        torch.Tensor
+                Slicing mask; either task index of each column of shape `(columns,)`
+                or boolean mask of shape `(tasks, columns)`
+
+        """
+        pass
+
     def apply(self, weight, mask, task: int) -> None:
         """Apply mask to weight for a given task.
 
-        Side-effect function, should modify `weight` in-place.
+        Side-effect function, zeroes rows (output neurons) of `weight`
+        not belonging to `task` in-place.
 
         Parameters
         ----------
@@ -88,4 +164,4 @@ class Base:
                 Index of current task.
 
         """
-        pass
+        weight[~kept(mask, task).to(weight.device)] = 0
@@ -18,25 +18,8 @@ class Masker(_base.Base):
 
     """
 
-    @staticmethod
-    def _create_mask(label_summed):
+    stochastic = True
+
+    def create(self, label_summed):
         maximum, _ = label_summed.max(dim=0)
         return torch.bernoulli(label_summed / maximum.unsqueeze(0)).bool()
-
-    def first(self, weight):
-        return Masker._create_mask(
-            weight.reshape(self.labels, -1, weight.shape[1]).sum(dim=0)
-        )
-
-    def rest(self, weight):
-        return Masker._create_mask(
-            torch.stack(
-                [
-                    weight[self.last[task]].sum(dim=0)
-                    for task in range(self.last.shape[0])
-                ]
-            )
-        )
-
-    def apply(self, weight, mask, task) -> None:
-        weight *= mask[task].unsqueeze(0)
@@ -0,0 +1,113 @@
+"""
+Physically prune per-task networks obtained from masks.
+
+Masking zeroes whole rows of layer's weight (e.g. `greedy` masker), hence
+such (dead) neuron outputs constant `activation(bias)` for every input.
+Dead neurons of hidden layers are removed together with respective input
+columns of the next spatial layer and their constant contribution is folded
+into the next layer's bias, so pruned network computes exactly the same
+function with smaller matrix multiplications.
+
+For convolutions followed by another convolution constant channel
+is not equivalent to a bias because of zero padding at borders,
+so only channels whose `activation(bias)` is zero are pruned there.
+
+Outputs of the last layer are always kept.
+
+"""
+
+import typing
+
+import torch
+
+import nn
+
+
+def _weighted(module) -> torch.nn.Module:
+    """Return module holding `weight` and `bias` (inner one for convolutions)."""
+    return getattr(module, getattr(module, "_inner_module_name", ""), module)
+
+
+def _resize(module, attributes: typing.Tuple[str], size: int) -> None:
+    for submodule in (module, _weighted(module)):
+        for attribute in attributes:
+            if hasattr(submodule, attribute):
+                setattr(submodule, attribute, size)
+
+
+def _slice_outputs(module, keep) -> None:
+    weighted = _weighted(module)
+    weighted.weight = torch.nn.Parameter(weighted.weight[keep])
+    if weighted.bias is not None:
+        weighted.bias = torch.nn.Parameter(weighted.bias[keep])
+    module.positions = torch.nn.Parameter(module.positions[:, keep])
+    _resize(module, ("out_features", "out_channels"), int(keep.sum()))
+
+
+def _slice_inputs(module, keep, shift) -> None:
+    weighted = _weighted(module)
+    weighted.weight = torch.nn.Parameter(weighted.weight[:, keep])
+    if weighted.bias is not None:
+        weighted.bias = torch.nn.Parameter(weighted.bias + shift)
+    _resize(module, ("in_features", "in_channels"), int(keep.sum()))
+
+
+def _dead(module) -> torch.Tensor:
+    """Boolean tensor specifying neurons (output channels) with zero weight."""
+    weight = _weighted(module).weight
+    return ~weight.reshape(weight.shape[0], -1).any(dim=-1)
+
+
+def _folded(module, next_module, activation) -> typing.Tuple[torch.Tensor]:
+    """Return neurons of `module` to keep and shift of `next_module` bias."""
+    dead = _dead(module)
+    bias = _weighted(module).bias
+    constant = torch.zeros_like(dead, dtype=torch.float)
+    if bias is not None:
+        constant = activation(bias.detach())
+    # Constant input channel of convolution is not a bias (padding)
+    if isinstance(next_module, nn.layers._SpatialConv):
+        dead &= constant == 0
+    # Convolution cannot have zero channels, single (dead) one is kept
+    if isinstance(module, nn.layers._SpatialConv) and dead.all():
+        dead[0] = False
+    columns = _weighted(next_module).weight[:, dead]
+    if columns.dim() > 2:
+        # Kernel of convolution (only channels with zero activation get here)
+        columns = columns.flatten(start_dim=2).sum(dim=-1)
+    return ~dead, columns @ constant[dead]
+
+
+def prune(model: torch.nn.Module) -> torch.nn.Module:
+    """Remove dead neurons of hidden spatial layers in-place.
+
+    Parameters
+    ----------
+    model: torch.nn.Module
+            Network created by `nn.models.get` with masks already applied
+            (e.g. `artifact.Split.materialize`).
+
+    Returns
+    -------
+    torch.nn.Module
+            The same (modified) network.
+
+    """
+    modules = [module for module in model.modules() if nn.layers.spatial(module)]
+    # Every hidden layer of `nn.models` network is followed by the same activation
+    activation = model.layers[1] if len(model.layers) > 1 else None
+    with torch.no_grad():
+        for module, next_module in zip(modules[:-1], modules[1:]):
+            keep, shift = _folded(module, next_module, activation)
+            _slice_outputs(module, keep)
+            _slice_inputs(next_module, keep, shift)
+    return model
+
+
+def widths(model: torch.nn.Module) -> typing.List[int]:
+    """Return number of output neurons of each spatial layer."""
+    return [
+        _weighted(module).weight.shape[0]
+        for module in model.modules()
+        if nn.layers.spatial(module)
+    ]
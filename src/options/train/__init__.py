@@ -23,7 +23,7 @@ def run(args):
     # Datasets specified by user
     train_datasets = get_datasets(args, train=True)
     validation_datasets = get_datasets(args, train=False)
-    print(f"Datasets used: {[type(dataset).__name__ for dataset in train_datasets]}\n")
+    print(f"Datasets used: {args.datasets}\n")
 
     # Appropriate dataloader constructed from those datasets
     train, validation = (
@@ -45,10 +45,20 @@ def run(args):
     )
     writer = SummaryWriter(log_dir=args.tensorboard)
     train_gatherer = nn.metrics.get(
-        writer, train, stage="Train", tasks=len(train_datasets), input_type=args.input,
+        writer,
+        train,
+        stage="Train",
+        tasks=len(train_datasets),
+        input_type=args.input,
+        criterion=loss,
     )
     validation_gatherer = nn.metrics.get(
-        writer, validation, stage="Validation", tasks=len(validation_datasets), input_type=args.input
+        writer,
+        validation,
+        stage="Validation",
+        tasks=len(validation_datasets),
+        input_type=args.input,
+        criterion=loss,
     )
 
     # Save best model
@@ -56,8 +66,12 @@ def run(args):
 
     train_pass = nn.passes.Train(model, loss, optimizer, args.cuda)
     validation_pass = nn.passes.Validation(model, loss, args.cuda)
-    train_loop = nn.train.get_loop(train_pass, train, hyperparams)
-    validation_loop = nn.train.get_loop(validation_pass, validation, hyperparams)
+    train_loop = nn.train.get_loop(
+        train_pass, train, hyperparams, args.workers, args.prefetch
+    )
+    validation_loop = nn.train.get_loop(
+        validation_pass, validation, hyperparams, args.workers, args.prefetch
+    )
 
     # Run training and validation
     for epoch in range(hyperparams["epochs"]):
@@ -0,0 +1,32 @@
+import argparse
+import pathlib
+import sys
+
+import pytest
+import torch
+
+# Modules of `src` are imported just like `main.py` does (e.g. `import nn`)
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / "src"))
+
+import nn  # noqa: E402
+
+
+@pytest.fixture
+def network():
+    """Create spatial network (shapes inferred) with all layers being spatial."""
+
+    def create(kind: str, tasks: int = 2, labels: int = 5, layers=(8, 6)):
+        args = argparse.Namespace(
+            type=kind,
+            input="sequential",
+            labels=labels,
+            datasets=[None] * tasks,
+            activation="ReLU",
+            layers=list(layers),
+            where=list(range(len(layers) + 1)),
+        )
+        model = nn.models.get(args)
+        model(torch.randn(1, 1, 12, 12))
+        return model
+
+    return create
@@ -0,0 +1,179 @@
+import pickle
+
+import pytest
+import torch
+
+pytest.importorskip("torchdata")
+
+import data  # noqa: E402
+
+
+class Samples(torch.utils.data.Dataset):
+    """In-memory dataset indexed only sample by sample (no `gather`)."""
+
+    def __init__(self, length: int, labels: int = 5, shift: float = 0):
+        self.images = torch.rand(length, 1, 4, 4) + shift
+        self.labels = torch.randint(labels, (length,))
+
+    def __getitem__(self, index):
+        return self.images[index], int(self.labels[index])
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def iterate(dataset, batch_size=None, seed: int = 0):
+    torch.manual_seed(seed)
+    dataset.batch_size = batch_size
+    return list(dataset)
+
+
+def samples(batches):
+    images = torch.cat([images for images, _ in batches])
+    labels = torch.cat([torch.as_tensor(labels) for _, labels in batches])
+    return images, labels
+
+
+@pytest.mark.parametrize("sampler", ["DatasetRandomSampler", "TaskSampler"])
+@pytest.mark.parametrize("batch_size", [1, 4, 7])
+def test_sequential_batches(sampler, batch_size):
+    dataset = data.datasets.Sequential(
+        5,
+        getattr(data.samplers, sampler),
+        Samples(10, shift=0),
+        Samples(13, shift=1),
+    )
+    single = iterate(dataset)
+    batches = iterate(dataset, batch_size)
+    assert [len(labels) for _, labels in batches[:-1]] == [batch_size] * (
+        len(batches) - 1
+    )
+    images, labels = samples(batches)
+    assert torch.equal(images, torch.stack([image for image, _ in single]))
+    assert torch.equal(labels, torch.tensor([label for _, label in single]))
+    # Labels of the second dataset are shifted, task of each sample is recorded
+    assert torch.equal(dataset.dataset, labels[-len(dataset.dataset) :] // 5)
+
+
+class Pictures(torch.utils.data.Dataset):
+    """Stand-in for `torchvision` dataset returning `PIL.Image`, `int` pairs."""
+
+    created = 0
+
+    def __init__(self, root, train: bool = True, download: bool = False):
+        Pictures.created += 1
+        generator = torch.Generator().manual_seed(int(train))
+        self.images = torch.randint(256, (6, 3, 5, 4), generator=generator).byte()
+        self.labels = torch.randint(10, (6,), generator=generator)
+
+    def __getitem__(self, index):
+        image = data.cache.torchvision.transforms.functional.to_pil_image(
+            self.images[index]
+        )
+        return image, int(self.labels[index])
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        data.cache.torchvision.datasets, "Pictures", Pictures, raising=False
+    )
+    monkeypatch.setattr(Pictures, "created", 0)
+    original = Pictures(tmp_path)
+    transform = data.cache.torchvision.transforms.ToTensor()
+
+    cached = data.cache.get(tmp_path, "Pictures", train=True)
+    assert len(cached) == len(original)
+    assert cached.images.dtype == torch.uint8
+    for index in range(len(original)):
+        image, label = original[index]
+        cached_image, cached_label = cached[index]
+        assert torch.equal(cached_image, transform(image))
+        assert cached_label == label
+
+    indices = torch.tensor([4, 0, 4, 2])
+    images, labels = cached.gather(indices)
+    assert torch.equal(images, torch.stack([cached[i][0] for i in indices.tolist()]))
+    assert torch.equal(labels, original.labels[indices])
+
+    # Saved arrays are reused by later runs, only paths are pickled
+    created = Pictures.created
+    reloaded = pickle.loads(pickle.dumps(data.cache.get(tmp_path, "Pictures", True)))
+    assert Pictures.created == created
+    assert torch.equal(reloaded.images, cached.images)
+    assert torch.equal(reloaded.labels, cached.labels)
+    assert not (tmp_path / "cache" / "Pictures" / "test_images.npy").exists()
+
+
+class Indices(torch.utils.data.Dataset):
+    """Dataset whose every image is filled with its own (global) index."""
+
+    def __init__(self, length: int, start: int = 0):
+        self.length = length
+        self.start = start
+
+    def __getitem__(self, index):
+        return torch.full((1, 2, 2), float(self.start + index)), index % 5
+
+    def __len__(self):
+        return self.length
+
+
+def load(dataset, workers: int, seed: int = 0):
+    loader = torch.utils.data.DataLoader(
+        dataset,
+        batch_size=None,
+        num_workers=workers,
+        generator=torch.Generator().manual_seed(seed),
+    )
+    images = [images.reshape(-1, *images.shape[-3:])[..., 0, 0] for images, _ in loader]
+    return torch.cat(images)
+
+
+@pytest.mark.filterwarnings("ignore:This DataLoader will create")
+@pytest.mark.parametrize("batch_size", [None, 3])
+@pytest.mark.parametrize("sampler", ["DatasetRandomSampler", "TaskSampler"])
+def test_sequential_workers(sampler, batch_size):
+    dataset = data.datasets.Sequential(
+        5, getattr(data.samplers, sampler), Indices(11), Indices(6, start=11)
+    )
+    dataset.batch_size = batch_size
+    # Single worker yields whole sampler order (seeded by DataLoader)
+    expected = load(dataset, workers=1).flatten()
+    sharded = load(dataset, workers=2).flatten()
+    assert torch.equal(sharded, expected)
+    assert torch.equal(sharded.sort().values, torch.arange(17.0))
+
+
+@pytest.mark.filterwarnings("ignore:This DataLoader will create")
+@pytest.mark.parametrize("batch_size", [None, 4])
+def test_joined_workers(batch_size):
+    dataset = data.datasets.Stacked(
+        5, data.samplers.JoinedSampler, Indices(9), Indices(9, start=9)
+    )
+    dataset.batch_size = batch_size
+    expected = load(dataset, workers=1)
+    sharded = load(dataset, workers=2)
+    assert torch.equal(sharded, expected)
+    assert torch.equal(sharded.flatten().sort().values, torch.arange(18.0))
+
+
+@pytest.mark.parametrize("kind", ["Mix", "Stacked"])
+@pytest.mark.parametrize("batch_size", [1, 4, 6])
+def test_joined_batches(kind, batch_size):
+    # Shorter dataset is upsampled (with replacement)
+    dataset = getattr(data.datasets, kind)(
+        5, data.samplers.JoinedSampler, Samples(9), Samples(6, shift=1)
+    )
+    single = iterate(dataset)
+    batches = iterate(dataset, batch_size)
+    assert len(single) == 9
+    assert [len(labels) for _, labels in batches] == [
+        min(batch_size, 9 - start) for start in range(0, 9, batch_size)
+    ]
+    images, labels = samples(batches)
+    assert torch.equal(images, torch.stack([image for image, _ in single]))
+    assert torch.equal(labels, torch.stack([label for _, label in single]))
+    assert images.shape[1:] == dataset.shape.shape[1:]
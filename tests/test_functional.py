@@ -0,0 +1,143 @@
+import pytest
+import torch
+
+from nn import functional
+
+
+def dense_proximity(positions, epsilon: float = 1e-8):
+    distances = positions.unsqueeze(0) - positions.unsqueeze(1)
+    distances = (distances.pow(2).sum(-1) + epsilon).sqrt()
+    return torch.exp(-distances).mean()
+
+
+def gradient(function, positions):
+    positions = positions.clone().requires_grad_()
+    function(positions).backward()
+    return positions.grad
+
+
+@pytest.mark.parametrize("neurons", [7, 256, 2048])
+@pytest.mark.parametrize("tile", [None, 5])
+def test_proximity_gradient(neurons, tile):
+    torch.manual_seed(0)
+    positions = torch.rand(neurons, 2)
+    expected = gradient(dense_proximity, positions.double())
+    result = gradient(lambda p: functional.proximity(p, tile=tile), positions)
+    error = (result.double() - expected).norm() / expected.norm()
+    assert error < 1e-6
+
+
+@pytest.mark.parametrize("tile", [None, 5])
+def test_batched_proximity_gradient(tile):
+    torch.manual_seed(0)
+    layers = [torch.rand(neurons, 2) for neurons in (7, 64, 300)]
+    expected = [gradient(dense_proximity, positions.double()) for positions in layers]
+    layers = [positions.clone().requires_grad_() for positions in layers]
+    functional.batched_proximity(layers, tile=tile).sum().backward()
+    for positions, reference in zip(layers, expected):
+        error = (positions.grad.double() - reference).norm() / reference.norm()
+        assert error < 1e-6
+
+
+@pytest.mark.parametrize("dimensions", [1, 2, 3])
+def test_neighbours(dimensions):
+    torch.manual_seed(0)
+    positions = torch.rand(300, dimensions) * 4
+    rows, columns = functional.neighbours(positions, cutoff=0.5)
+    distances = torch.cdist(positions, positions)
+    expected = set(map(tuple, (distances < 0.5).nonzero().tolist()))
+    assert set(zip(rows.tolist(), columns.tolist())) == expected
+    assert len(rows) == len(expected)
+
+
+def test_sparse_proximity_all_pairs():
+    torch.manual_seed(0)
+    positions = torch.rand(50, 2)
+    rows, columns = functional.neighbours(positions, cutoff=10.0)
+    assert torch.allclose(
+        functional.sparse_proximity(positions, rows, columns),
+        dense_proximity(positions),
+    )
+
+
+def dense_transport(positions, previous_positions, weight, norm):
+    distances = positions.unsqueeze(1) - previous_positions.unsqueeze(0)
+    distances = distances.pow(2).sum(-1).sqrt()
+    normed = functional._norm(weight, norm)
+    # Distance is broadcast over kernel elements (convolution)
+    distances = distances.view(*distances.shape, *[1] * (weight.dim() - 2))
+    return (distances * normed).mean()
+
+
+@pytest.mark.parametrize("norm", ["l1", "l2"])
+@pytest.mark.parametrize("tile", [None, 3])
+def test_transport(norm, tile):
+    torch.manual_seed(0)
+    inputs = (
+        torch.randn(7, 2, dtype=torch.double, requires_grad=True),
+        torch.randn(5, 2, dtype=torch.double, requires_grad=True),
+        torch.randn(7, 5, dtype=torch.double, requires_grad=True),
+    )
+    assert torch.allclose(
+        functional.transport(*inputs, norm, tile), dense_transport(*inputs, norm)
+    )
+    assert torch.autograd.gradcheck(
+        lambda *tensors: functional.transport(*tensors, norm, tile), inputs
+    )
+
+
+@pytest.mark.parametrize("kernel_size", [(3,), (3, 3)])
+def test_transport_convolution(kernel_size):
+    torch.manual_seed(0)
+    inputs = (
+        torch.randn(6, 2, dtype=torch.double, requires_grad=True),
+        torch.randn(4, 2, dtype=torch.double, requires_grad=True),
+        torch.randn(6, 4, *kernel_size, dtype=torch.double, requires_grad=True),
+    )
+    assert torch.allclose(
+        functional.transport(*inputs, "l2", 4), dense_transport(*inputs, "l2")
+    )
+    assert torch.autograd.gradcheck(
+        lambda *tensors: functional.transport(*tensors, "l2", 4), inputs
+    )
+    torch.manual_seed(0)
+    sampled = torch.stack(
+        [functional.sampled_transport(*inputs, "l2", 4096) for _ in range(200)]
+    )
+    assert torch.isclose(
+        sampled.mean(), dense_transport(*inputs, "l2"), rtol=0.02
+    )
+
+
+@pytest.mark.parametrize("tile", [None, 3])
+def test_batched_transport(tile):
+    torch.manual_seed(0)
+    shapes = [(7, 5, ()), (4, 7, (3,)), (6, 2, ())]
+    positions = [
+        torch.randn(out, 2, dtype=torch.double, requires_grad=True)
+        for out, _, _ in shapes
+    ]
+    previous = [
+        torch.randn(inputs, 2, dtype=torch.double, requires_grad=True)
+        for _, inputs, _ in shapes
+    ]
+    weights = [
+        torch.randn(out, inputs, *kernel, dtype=torch.double, requires_grad=True)
+        for out, inputs, kernel in shapes
+    ]
+    result = functional.batched_transport(positions, previous, weights, "l2", tile)
+    expected = torch.stack(
+        [
+            dense_transport(*layer, "l2")
+            for layer in zip(positions, previous, weights)
+        ]
+    )
+    assert torch.allclose(result, expected)
+
+    count = len(shapes)
+    assert torch.autograd.gradcheck(
+        lambda *tensors: functional.batched_transport(
+            tensors[:count], tensors[count : 2 * count], tensors[2 * count :], "l2", tile
+        ),
+        (*positions, *previous, *weights),
+    )
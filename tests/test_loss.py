@@ -0,0 +1,101 @@
+import pytest
+import torch
+
+import nn
+
+from test_functional import dense_proximity, dense_transport
+
+
+def spatial(model):
+    return [module for module in model.modules() if nn.layers.spatial(module)]
+
+
+def test_spatial_loss_convolution(network):
+    torch.manual_seed(0)
+    model = network("convolution")
+    criterion = nn.loss.SpatialCrossEntropyLoss(
+        model, 1.0, 1.0, "l2", [0, 1, 2], labels=5, tile=4
+    )
+    inputs, targets = torch.randn(4, 1, 12, 12), torch.randint(10, (4,))
+    criterion(model(inputs), targets).backward()
+    layers = spatial(model)
+    for index, layer in enumerate(layers):
+        assert torch.allclose(
+            criterion.breakdown[f"proximity{index}"], dense_proximity(layer.positions.T)
+        )
+        assert layer.positions.grad is not None
+        assert torch.isfinite(layer.positions.grad).all()
+    for index, (layer, previous) in enumerate(zip(layers[1:], layers), start=1):
+        assert torch.allclose(
+            criterion.breakdown[f"transport{index}"],
+            dense_transport(layer.positions.T, previous.positions.T, layer.weight, "l2"),
+        )
+
+
+@pytest.mark.parametrize("kind", ["linear", "convolution"])
+def test_batched_penalties(network, kind):
+    torch.manual_seed(0)
+    model = network(kind)
+    inputs, targets = torch.randn(4, 1, 12, 12), torch.randint(10, (4,))
+    losses, gradients = [], []
+    for batched in (False, True):
+        model.zero_grad()
+        criterion = nn.loss.SpatialCrossEntropyLoss(
+            model, 1.0, 1.0, "l1", [0, 1, 2], labels=5, batched=batched
+        )
+        loss = criterion(model(inputs), targets.clone())
+        loss.backward()
+        losses.append(loss.detach())
+        gradients.append([layer.positions.grad.clone() for layer in spatial(model)])
+    assert torch.allclose(*losses)
+    for unbatched, batched in zip(*gradients):
+        assert torch.allclose(unbatched, batched, atol=1e-6)
+
+
+def test_topology(network):
+    model = network("linear")
+    topology = nn.loss.Topology(model)
+    connections = topology()
+    assert topology() is connections
+    layers = spatial(model)
+    assert [connection.layer for connection in connections] == layers
+    assert [connection.previous for connection in connections] == [None, *layers[:-1]]
+    assert [connection.index for connection in connections] == [0, 1, 2]
+
+    # Layer registered after the topology was cached
+    model.extra = nn.layers._SpatialLinear(5, 3)
+    if topology._handle is None:
+        topology.invalidate()
+    assert [connection.layer for connection in topology()] == spatial(model)
+
+
+def test_interval():
+    interval = nn.loss.Interval(3)
+    steps = [interval(True) for _ in range(4)]
+    # Evaluation is always unscaled and does not count as a step
+    assert interval(False) == 1
+    steps += [interval(True) for _ in range(3)]
+    assert steps == [3, 0, 0, 3, 0, 0, 3]
+    with pytest.raises(ValueError):
+        nn.loss.Interval(0)
+
+
+def test_regularize_every(network):
+    torch.manual_seed(0)
+    model = network("linear")
+    criterion = nn.loss.SpatialCrossEntropyLoss(
+        model, 1.0, 1.0, "l2", [0, 1, 2], labels=5, every=2
+    )
+    inputs, targets = torch.randn(4, 1, 12, 12), torch.randint(10, (4,))
+    outputs = model(inputs)
+    regularized = criterion(outputs, targets.clone())
+    penalties = sum(
+        torch.stack(
+            [value for key, value in criterion.breakdown.items() if key.startswith(name)]
+        ).mean()
+        for name in ("proximity", "transport")
+    )
+    plain = criterion(outputs, targets.clone())
+    assert criterion.breakdown == {}
+    # Penalties of regularized step are scaled by `every`
+    assert torch.isclose(regularized, plain + 2 * penalties)
@@ -0,0 +1,98 @@
+import pytest
+import torch
+
+import nn
+
+pytest.importorskip("torchdata")
+
+from options.split.backward import _base, greedy, probability, rescale
+
+
+class Greedy:
+    """Per-task loop of greedy masker before aggregation in single operation."""
+
+    def __init__(self, labels: int):
+        self.labels = labels
+        self.last = None
+
+    def __call__(self, module):
+        weight = torch.abs(module.weight.data)
+        if self.last is None:
+            self.last = (
+                weight.reshape(self.labels, -1, weight.shape[1]).sum(dim=0).argmax(dim=0)
+            )
+        else:
+            self.last = torch.stack(
+                [weight[self.last == task].sum(dim=0) for task in self.last.unique()]
+            ).argmax(dim=0)
+        return self.last
+
+
+def layers(tasks: int, labels: int = 5, sizes=(20, 32, 16)):
+    torch.manual_seed(0)
+    sizes = (*sizes, labels * tasks)
+    return [
+        nn.layers._SpatialLinear(in_features, out_features).double()
+        for in_features, out_features in zip(sizes[:-1], sizes[1:])
+    ]
+
+
+def balanced(rows: int, tasks: int):
+    """Random assignment of rows to tasks, every task having some rows."""
+    return torch.arange(rows)[torch.randperm(rows)] % tasks
+
+
+@pytest.mark.parametrize("tasks", [2, 3, 7])
+def test_greedy_parity_with_baseline(tasks):
+    modules = list(reversed(layers(tasks)))
+    baseline, masker = Greedy(5), greedy.Masker(5)
+    assert torch.equal(masker(modules[0]), baseline(modules[0]))
+    assert masker.tasks == tasks
+    for module in modules[1:]:
+        # Baseline renumbers tasks if any of them has no rows, hence balanced
+        baseline.last = masker.last = balanced(module.weight.shape[0], tasks)
+        assert torch.equal(masker(module), baseline(module))
+
+
+def test_greedy_keeps_task_without_rows():
+    modules = list(reversed(layers(3)))
+    masker = greedy.Masker(5)
+    masker(modules[0])
+    masker.last = balanced(modules[1].weight.shape[0], 2) * 2
+    # Task 1 has no rows, so no column can belong to it
+    assert set(masker(modules[1]).tolist()) <= {0, 2}
+
+
+def test_greedy_apply_zeroes_other_tasks():
+    modules = layers(3)
+    # Mask created from columns of layer is applied to rows of the previous one
+    mask = greedy.Masker(5)(modules[-1])
+    weight = modules[-2].weight.data.clone()
+    for task in range(3):
+        masked = weight.clone()
+        greedy.Masker(5).apply(masked, mask, task)
+        assert torch.equal(masked[mask == task], weight[mask == task])
+        assert not masked[mask != task].any()
+
+
+@pytest.mark.parametrize("module", [probability, rescale])
+def test_stochastic_masker_sums(module):
+    modules = list(reversed(layers(3)))
+    masker = module.Masker(5)
+    torch.manual_seed(1)
+    masks = [masker(layer) for layer in modules]
+    assert masker.stochastic
+    for layer, mask in zip(modules[1:], masks[:-1]):
+        assert mask.shape == (3, layer.weight.shape[0])
+        weight = layer.weight.data.abs()
+        expected = torch.stack([weight[mask[task]].sum(dim=0) for task in range(3)])
+        assert torch.allclose(_base.summed(weight, mask, 3), expected)
+
+
+def test_masker_convolution_sums_kernels():
+    torch.manual_seed(0)
+    convolution = torch.nn.Conv2d(4, 10, kernel_size=3)
+    linear = torch.nn.Linear(4, 10)
+    with torch.no_grad():
+        linear.weight.copy_(convolution.weight.abs().sum(dim=(-2, -1)))
+    assert torch.equal(greedy.Masker(5)(convolution), greedy.Masker(5)(linear))
@@ -0,0 +1,22 @@
+import pickle
+
+import pytest
+import torch
+
+import nn
+
+
+def spatial(model):
+    return [module for module in model.modules() if nn.layers.spatial(module)]
+
+
+@pytest.mark.parametrize("kind", ["linear", "convolution"])
+def test_pickled_model(network, kind):
+    torch.manual_seed(0)
+    model = network(kind)
+    loaded = pickle.loads(pickle.dumps(model))
+    inputs = torch.randn(4, 1, 12, 12)
+    assert torch.equal(loaded(inputs), model(inputs))
+    assert len(spatial(loaded)) == len(spatial(model)) == 3
+    for original, module in zip(spatial(model), spatial(loaded)):
+        assert torch.equal(original.positions, module.positions)
@@ -0,0 +1,51 @@
+import sys
+
+import pytest
+
+from inputs import parser
+
+TRAIN = [
+    "--labels",
+    "5",
+    "train",
+    "--hyperparams",
+    "hyperparameters.json",
+    "--layers",
+    "10",
+    "--type",
+    "linear",
+    "--input",
+    "sequential",
+    "--activation",
+    "ReLU",
+    "--save",
+    "model.pt",
+    "--tensorboard",
+    "runs",
+]
+
+
+def parse(monkeypatch, *arguments):
+    monkeypatch.setattr(sys, "argv", ["main.py", *TRAIN, *arguments])
+    return parser.get()
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ["--tile", "1024"],
+        ["--tile", "8"],
+        ["--batched-penalties"],
+        ["--cutoff", "0.5"],
+        ["--proximity-samples", "16"],
+        ["--transport-samples", "16"],
+    ],
+)
+def test_compile_loss_rejects_approximations(monkeypatch, arguments):
+    with pytest.raises(ValueError, match="--compile-loss"):
+        parse(monkeypatch, "--compile-loss", *arguments)
+
+
+def test_compile_loss(monkeypatch):
+    args = parse(monkeypatch, "--compile-loss")
+    assert args.compile_loss and args.tile is None
@@ -0,0 +1,65 @@
+import pytest
+import torch
+
+import nn
+
+
+def criterion(predicted, label):
+    loss = torch.nn.functional.cross_entropy(predicted, label)
+    # Like spatial loss, labels are modified in-place
+    label += 1
+    return loss
+
+
+def models(count: int = 3):
+    torch.manual_seed(0)
+    return [
+        torch.nn.Sequential(
+            torch.nn.Linear(6, 8), torch.nn.ReLU(), torch.nn.Linear(8, 4)
+        )
+        for _ in range(count)
+    ]
+
+
+def expected(modules, sample):
+    image, label = sample
+    return [
+        nn.passes.Validation(module, criterion, cuda=False)((image, label.clone()))
+        for module in modules
+    ]
+
+
+@pytest.mark.parametrize("stacked", [False, True])
+def test_multi_validation_equals_validation(stacked):
+    modules = models()
+    validation = nn.passes.MultiValidation(modules, criterion, cuda=False)
+    if stacked:
+        # Stacked (vmap) path is used only with CUDA, forced on CPU here
+        validation.cuda = True
+        validation._forward = validation._stack()
+        validation.cuda = False
+        assert validation._forward is not None
+    sample = torch.randn(10, 6), torch.randint(4, (10,))
+    results = validation(sample)
+    assert len(results) == len(modules)
+    for (loss, predicted, label), (
+        expected_loss,
+        expected_predicted,
+        expected_label,
+    ) in zip(results, expected(modules, sample)):
+        assert torch.allclose(loss, expected_loss)
+        assert torch.allclose(predicted, expected_predicted, atol=1e-6)
+        # Every module gets its own copy of labels
+        assert torch.equal(label, expected_label)
+    assert torch.equal(sample[1] + 1, results[0][2])
+
+
+def test_multi_validation_shared_parameters():
+    module = models(1)[0]
+    views = [module, torch.nn.Sequential(*module)]
+    validation = nn.passes.MultiValidation(views, criterion, cuda=False)
+    assert validation._shared()
+    validation.cuda = True
+    # Views sharing parameters are never stacked
+    assert validation._stack() is None
+    assert not nn.passes.MultiValidation(models(), criterion, cuda=False)._shared()
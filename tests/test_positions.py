@@ -0,0 +1,76 @@
+import argparse
+
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("torchdata")
+
+from options.plot import positions
+from test_record import record
+
+
+def test_grid_covers_positions():
+    points = np.array([[0.0, 0.0], [1.0, 1.0], [0.5, 0.0], [0.0, 0.99]])
+    flat, extent = positions._grid(points, bins=4)
+    # Maximal position lands in the last bin, not outside of the grid
+    assert flat.tolist() == [0, 15, 2, 12]
+    assert extent == (0.0, 1.0, 0.0, 1.0)
+    # Degenerate (single point) dimension still gets a valid grid
+    flat, extent = positions._grid(np.array([[2.0, 3.0], [2.0, 5.0]]), bins=4)
+    assert flat.tolist() == [0, 12]
+    assert positions._bins(1, 256) == 8
+    assert positions._bins(40000, 256) == 256
+
+
+def test_task_and_value_images():
+    points = np.array([[0.0, 0.0], [0.1, 0.1], [0.2, 0.0], [9.9, 9.9], [10.0, 0.0]])
+    palette = np.eye(4)[:3]
+    image, _ = positions.task_image(points, np.array([1, 2, 1, 0, 2]), palette, 8)
+    assert image.shape == (8, 8, 4)
+    # Majority task colors the bin, alpha grows with number of neurons
+    assert np.array_equal(image[0, 0, :3], palette[1, :3])
+    assert image[0, 0, 3] == pytest.approx(1.0)
+    assert np.array_equal(image[7, 7, :3], palette[0, :3])
+    assert image[7, 7, 3] == pytest.approx(0.3 + 0.7 / 3)
+    assert image[3, 3, 3] == 0
+
+    values, _ = positions.value_image(points, np.array([1.0, 2.0, 3.0, 4.0, 5.0]), 8)
+    assert values[0, 0] == 2.0
+    assert values[0, 7] == 5.0
+    assert np.isnan(values[3, 3])
+
+
+@pytest.mark.parametrize("color", ["task", "activations"])
+def test_plot_positions(tmp_path, monkeypatch, network, color):
+    torch.manual_seed(0)
+    model = network("linear").eval()
+    record(
+        model,
+        torch.randn(32, 1, 12, 12),
+        tmp_path / "recorded",
+        reduction="mean",
+        quantiles=None,
+        bins=16,
+    )
+    # Model is passed directly instead of being loaded from --model
+    monkeypatch.setattr(positions.split_utils, "get_model", lambda args: model)
+    args = argparse.Namespace(
+        model="model.pt",
+        data=tmp_path / "recorded",
+        save=tmp_path / "plots",
+        color=color,
+        resolution=16,
+        labels=5,
+    )
+    layers = positions.get_positions(model)
+    assert [len(layer) for layer in layers] == [8, 6, 10]
+    if color == "task":
+        tasks = positions.get_tasks(args, model)
+        assert [len(layer) for layer in tasks] == [8, 6, 10]
+    else:
+        values = positions.get_activations(args, model)
+        assert [len(layer) for layer in values] == [8, 6, 10]
+        assert np.isnan(values[-1]).all() and not np.isnan(values[0]).any()
+    positions.plot(args)
+    assert (tmp_path / "plots" / "positions.png").exists()
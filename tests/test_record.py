@@ -0,0 +1,120 @@
+import argparse
+
+import pytest
+import torch
+
+pytest.importorskip("torchdata")
+
+import nn
+from options import plot
+from options.record import finalize, recorders, reduction
+
+
+class Tasks:
+    """Minimal sequential dataset; `dataset` holds task of each sample."""
+
+    inner_datasets = 2
+
+    def __init__(self):
+        self.dataset = None
+
+
+def record(model, inputs, folder, **arguments):
+    args = argparse.Namespace(save=str(folder), **arguments)
+    dataset = Tasks()
+    recorder = recorders.get(dataset, reduction.get(args), reduction.statistics(args))
+    recorders.register(model, recorder)
+    with torch.no_grad():
+        for batch in inputs.split(16):
+            dataset.dataset = torch.randint(dataset.inner_datasets, (len(batch),))
+            model(batch)
+    finalize.apply(recorder, args)
+    recorders.save(recorder, args)
+
+
+def test_plot_quantiles(tmp_path):
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        nn.layers._SpatialLinear(6, 8),
+        torch.nn.ReLU(),
+        nn.layers._SpatialLinear(8, 3),
+    )
+    record(
+        model,
+        torch.randn(64, 6),
+        tmp_path / "recorded",
+        reduction="quantiles",
+        quantiles=[0.5, 0.9],
+        bins=16,
+    )
+    plot.run(
+        argparse.Namespace(
+            data=tmp_path / "recorded", model=None, save=tmp_path / "plots", workers=0
+        )
+    )
+    assert sorted(path.name for path in (tmp_path / "plots").iterdir()) == [
+        "task_0.png",
+        "task_1.png",
+    ]
+
+
+@pytest.mark.parametrize("name", ["mean", "quantiles"])
+def test_plot_convolution(tmp_path, name):
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        nn.layers.SpatialConv(4, kernel_size=3),
+        torch.nn.ReLU(),
+        nn.layers.SpatialConv(3, kernel_size=3),
+    )
+    # Shapes are inferred during first forward pass
+    model(torch.randn(1, 1, 8, 8))
+    record(
+        model,
+        torch.randn(64, 1, 8, 8),
+        tmp_path / "recorded",
+        reduction=name,
+        quantiles=[0.25, 0.5, 0.75, 0.9],
+        bins=16,
+    )
+    plot.run(
+        argparse.Namespace(
+            data=tmp_path / "recorded", model=None, save=tmp_path / "plots", workers=0
+        )
+    )
+    assert len(list((tmp_path / "plots").iterdir())) == 2
+
+
+@pytest.mark.parametrize("name", ["mean", "variance"])
+def test_record_tasks_of_batch(tmp_path, name):
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        nn.layers._SpatialLinear(6, 8),
+        torch.nn.ReLU(),
+        nn.layers._SpatialLinear(8, 3),
+    )
+    inputs = torch.randn(80, 6)
+    # Samples of both tasks are mixed within every batch
+    tasks = torch.randint(2, (80,))
+    with torch.no_grad():
+        layers = [inputs, model[1](model[0](inputs))]
+    dataset = Tasks()
+    args = argparse.Namespace(save=str(tmp_path), reduction=name)
+    recorder = recorders.get(dataset, reduction.get(args), reduction.statistics(args))
+    recorders.register(model, recorder)
+    with torch.no_grad():
+        for batch, batch_tasks in zip(inputs.split(16), tasks.split(16)):
+            dataset.dataset = batch_tasks
+            model(batch)
+    finalize.apply(recorder, args)
+    recorders.save(recorder, args)
+
+    for task in range(2):
+        for index, layer in enumerate(layers):
+            values = layer[tasks == task]
+            if name == "mean":
+                expected = values.abs().mean(dim=0)
+            else:
+                expected = values.var(dim=0, unbiased=False)
+            recorded = torch.load(tmp_path / str(task) / f"{index}.pt")
+            assert recorded.shape == expected.shape
+            assert torch.allclose(recorded, expected, atol=1e-5)
@@ -0,0 +1,156 @@
+import argparse
+import json
+import pickle
+
+import pytest
+import torch
+
+import nn
+
+pytest.importorskip("torchdata")
+
+from options.score import _dev_utils as score_utils
+from options.split import _dev_utils, activations, artifact, backward, prune
+from options.split.backward import greedy
+
+
+def test_neurons_quantiles_of_convolution(tmp_path):
+    # As many quantiles as channels, layout cannot be told from shape
+    values = torch.rand(16, 16, 3, 3)
+    torch.save(values, tmp_path / "1.pt")
+    result = activations.neurons(tmp_path / "1.pt", 16, quantiles=True)
+    assert torch.allclose(result, values.mean(dim=0).flatten(1).sum(dim=-1))
+    result = activations.neurons(tmp_path / "1.pt", 16)
+    assert torch.allclose(result, values.flatten(1).sum(dim=-1))
+
+
+def split(model, tasks: int = 2, labels: int = 5):
+    model.eval()
+    masks = _dev_utils.get_masks(model, tasks, greedy.Masker(labels))
+    return artifact.Split(model, "greedy", labels, tasks, dict(enumerate(masks[:-1])))
+
+
+def spatial(model):
+    return [module for module in model.modules() if nn.layers.spatial(module)]
+
+
+@pytest.mark.parametrize("kind", ["linear", "convolution"])
+@pytest.mark.parametrize("pickled", [False, True])
+def test_split_masks_weights(network, kind, pickled):
+    torch.manual_seed(0)
+    model = network(kind)
+    if pickled:
+        model = pickle.loads(pickle.dumps(model))
+    splitted = split(model)
+    inputs = torch.randn(4, 1, 12, 12)
+    for task in range(len(splitted)):
+        materialized = splitted.materialize(task)
+        assert len(spatial(materialized)) == 3
+        assert torch.allclose(splitted[task](inputs), materialized(inputs))
+        for layer, mask in splitted.masks.items():
+            base = spatial(model)[layer].weight
+            weight = spatial(materialized)[layer].weight
+            kept = mask == task
+            assert torch.equal(weight[kept], base[kept])
+            assert not weight[~kept].any()
+
+
+@pytest.mark.parametrize("kind", ["linear", "convolution"])
+@pytest.mark.parametrize("pickled", [False, True])
+def test_pruned_equals_materialized(network, kind, pickled):
+    torch.manual_seed(0)
+    model = network(kind)
+    with torch.no_grad():
+        # Channels followed by convolution are pruned only if activation(bias) is zero
+        bias = prune._weighted(spatial(model)[0]).bias
+        bias.copy_(-bias.abs())
+    if pickled:
+        model = pickle.loads(pickle.dumps(model))
+    splitted = split(model)
+    inputs = torch.randn(4, 1, 12, 12)
+    for task in range(len(splitted)):
+        pruned = splitted.pruned(task)
+        assert torch.allclose(
+            pruned(inputs), splitted.materialize(task)(inputs), atol=1e-6
+        )
+        widths = prune.widths(pruned)
+        for layer, mask in splitted.masks.items():
+            # Convolution keeps at least one channel
+            assert widths[layer] == max(int((mask == task).sum()), 1)
+
+
+@pytest.mark.parametrize("kind", ["linear", "convolution"])
+def test_split_save_load(tmp_path, network, kind):
+    torch.manual_seed(0)
+    splitted = split(network(kind))
+    splitted.save(tmp_path / "split")
+    # Scoring finds artifact and loads base model once for all tasks
+    loaded = list(score_utils.get_models(tmp_path / "split"))
+    assert len(loaded) == len(splitted)
+    inputs = torch.randn(4, 1, 12, 12)
+    for task, model in enumerate(loaded):
+        assert torch.allclose(model(inputs), splitted[task](inputs))
+    # Views share parameters of single base model
+    assert loaded[0].model is loaded[1].model
+
+
+def sweep(folder, workers: int = 0, **arguments):
+    return argparse.Namespace(
+        save=str(folder), labels=5, workers=workers, prune=False, **arguments
+    )
+
+
+def test_split_sweep(tmp_path, network):
+    torch.manual_seed(0)
+    model = network("linear").eval()
+    args = sweep(
+        tmp_path,
+        method=["greedy", "probability"],
+        seeds=[0, 1],
+        where=[[0, 1], [1]],
+    )
+    splits = _dev_utils.generate_networks(args, model, 2)
+    variants = json.load(open(tmp_path / "variants.json"))
+    # Deterministic greedy is not repeated for each seed
+    assert [(variant["method"], variant["seed"]) for variant in variants] == [
+        ("greedy", None),
+        ("greedy", None),
+        ("probability", 0),
+        ("probability", 0),
+        ("probability", 1),
+        ("probability", 1),
+    ]
+    assert len(splits) == len(variants)
+    # Base model saved once and shared by all variants
+    assert sorted(path.name for path in tmp_path.glob("**/*.pt")) == [
+        artifact.BASE
+    ] + [artifact.MASKS] * len(variants)
+
+    inputs = torch.randn(4, 1, 12, 12)
+    for variant, splitted in zip(variants, splits):
+        assert sorted(splitted.masks) == variant["where"]
+        loaded = artifact.Split.load(variant["folder"])
+        for layer, mask in splitted.masks.items():
+            assert torch.equal(loaded.masks[layer], mask)
+            assert variant["kept"][str(layer)] == [
+                int(backward.kept(mask, task).sum()) for task in range(2)
+            ]
+        assert torch.allclose(loaded[1](inputs), splitted[1](inputs))
+    # Variants sharing method and seed share masks, different seeds differ
+    assert torch.equal(splits[2].masks[1], splits[3].masks[1])
+    assert not torch.equal(splits[2].masks[1], splits[4].masks[1])
+
+
+def test_split_sweep_workers(tmp_path, network):
+    torch.manual_seed(0)
+    model = network("linear").eval()
+    arguments = dict(method=["greedy", "rescale"], seeds=[3], where=None)
+    variants = _dev_utils.get_variants(sweep(tmp_path, **arguments), model)
+    masks = _dev_utils.compute_masks(sweep(tmp_path, **arguments), model, 2, variants)
+    # Seeded masks do not depend on process creating them
+    parallel = _dev_utils.compute_masks(
+        sweep(tmp_path, workers=2, **arguments), model, 2, variants
+    )
+    assert masks.keys() == parallel.keys() == {("greedy", None), ("rescale", 3)}
+    for key, layers in masks.items():
+        assert all(map(torch.equal, layers, parallel[key]))
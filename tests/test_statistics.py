@@ -0,0 +1,48 @@
+import pytest
+import torch
+
+pytest.importorskip("torchdata")
+
+from options.record import statistics
+
+
+def test_histogram_non_finite():
+    histogram = statistics.Histogram(tasks=1, bins=4)
+    tasks = torch.zeros(3, dtype=torch.long)
+    histogram.update(torch.tensor([[0.0], [1.0], [0.5]]), tasks)
+    # Used to double range of the neuron forever
+    histogram.update(torch.tensor([[float("inf")], [2.0], [1.0]]), tasks)
+    histogram.update(torch.tensor([[-float("inf")], [float("nan")], [1.0]]), tasks)
+    counts = histogram.counts[0, 0]
+    # NaN is not counted, infinities land in the edge bins
+    assert counts.sum() == 8
+    assert counts[0] >= 1 and counts[-1] >= 1
+    assert torch.isfinite(histogram.low).all()
+    assert torch.isfinite(histogram.width).all()
+
+
+@pytest.mark.parametrize("sizes", [(50,), (1, 49), (7, 13, 30), (20, 0, 30)])
+def test_chan_merging_equals_single_pass(sizes):
+    torch.manual_seed(0)
+    # Large offset, naive E[x^2] - E[x]^2 would lose most digits
+    values = torch.randn(50, 3, 2, dtype=torch.float64) + 1e4
+    tasks = torch.randint(3, (50,))
+    tasks[tasks == 2] = 1  # Last task never occurs
+
+    single = statistics.Statistics(tasks=3)
+    single.update(values, tasks)
+    merged = statistics.Statistics(tasks=3)
+    for batch, batch_tasks in zip(values.split(sizes), tasks.split(sizes)):
+        merged.update(batch, batch_tasks)
+
+    assert torch.equal(merged.count, single.count)
+    assert torch.allclose(merged.mean, single.mean)
+    assert torch.allclose(merged.variance, single.variance)
+    for task in range(2):
+        task_values = values[tasks == task]
+        assert torch.allclose(merged.mean[task], task_values.mean(dim=0))
+        assert torch.allclose(
+            merged.variance[task], task_values.var(dim=0, unbiased=False)
+        )
+        assert torch.allclose(merged.sum[task], task_values.sum(dim=0))
+    assert torch.equal(merged.variance[2], torch.zeros(3, 2, dtype=torch.float64))
@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+import torch
+
+import nn
+
+
+def batches(count: int, fail: int = None):
+    for index in range(count):
+        if index == fail:
+            raise RuntimeError("Loading failed")
+        yield torch.full((2,), float(index)), torch.tensor([index])
+
+
+@pytest.mark.parametrize("depth", [0, 1, 3])
+def test_loop_prefetch_keeps_order(depth):
+    loop = nn.train.Loop(lambda sample: sample, list(batches(10)), 10, prefetch=depth)
+    for index, (image, label) in enumerate(loop()):
+        assert torch.equal(image, torch.full((2,), float(index)))
+        assert label.item() == index
+    assert index == 9
+
+
+def test_prefetcher_raises_loading_error():
+    prefetcher = nn.train.Prefetcher(batches(10, fail=4), depth=2, cuda=False)
+    labels = []
+    with pytest.raises(RuntimeError, match="Loading failed"):
+        for _, label in prefetcher:
+            labels.append(label.item())
+    assert labels == [0, 1, 2, 3]
+
+
+def test_prefetcher_stops_when_closed():
+    threads = threading.active_count()
+    samples = iter(nn.train.Prefetcher(batches(1000), depth=2, cuda=False))
+    next(samples)
+    samples.close()
+    # Thread blocked on full queue is released and finishes
+    assert threading.active_count() == threads